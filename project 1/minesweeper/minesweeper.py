@@ -1,5 +1,9 @@
 import itertools
+import logging
 import random
+from collections import deque
+
+logger = logging.getLogger(__name__)
 
 class Minesweeper():
     def __init__(self, height=8, width=8, mines=8):
@@ -16,6 +20,9 @@ class Minesweeper():
                 self.board[i][j] = True
 
         self.mines_found = set()
+        self.grid = BitGrid(height, width)
+        self.mine_bits = self.grid.mask(self.mines)
+        self.counts = self.grid.counts(self.mine_bits)
 
     def print(self):
         for i in range(self.height):
@@ -31,18 +38,128 @@ class Minesweeper():
         return self.board[cell[0]][cell[1]]
 
     def nearby_mines(self, cell):
-        count = 0
-        
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-                if (i, j) != cell and 0 <= i < self.height and 0 <= j < self.width and self.board[i][j]:
-                    count += 1
-                    
-        return count
+        return self.counts[self.grid.index(cell)]
+
+    def reveal(self, cell, revealed=()):
+        if self.is_mine(cell):
+            return []
+
+        seen = {cell}
+        queue = deque([cell])
+        reveals = []
+
+        while queue:
+            current = queue.popleft()
+            count = self.nearby_mines(current)
+            reveals.append((current, count))
+
+            if count:
+                continue
+
+            for neighbour in self.grid.neighbour_cells(current):
+                if neighbour not in seen and neighbour not in revealed:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+
+        return reveals
 
     def won(self):
         return self.mines_found == self.mines
 
+def set_bits(bits):
+    if not bits:
+        return
+
+    low = (bits & -bits).bit_length() - 1
+    digits = bin(bits >> low)[:1:-1]
+    index = digits.find("1")
+
+    while index >= 0:
+        yield low + index
+        index = digits.find("1", index + 1)
+
+class BitGrid():
+    """Integer bitset view of a board: cell `(i, j)` is bit `i * width + j`."""
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.size = height * width
+        self.full = (1 << self.size) - 1
+        column = sum(1 << (i * width) for i in range(height))
+        self.not_first = self.full & ~column
+        self.not_last = self.full & ~(column << (width - 1))
+
+    def index(self, cell):
+        return cell[0] * self.width + cell[1]
+
+    def cell(self, index):
+        return divmod(index, self.width)
+
+    def neighbour_cells(self, cell):
+        i, j = cell
+        return [
+            (ni, nj)
+            for ni in range(max(i - 1, 0), min(i + 2, self.height))
+            for nj in range(max(j - 1, 0), min(j + 2, self.width))
+            if (ni, nj) != (i, j)
+        ]
+
+    def neighbours(self, index):
+        i, j = self.cell(index)
+        row = 0b111 if 0 < j < self.width - 1 else 0b11 if self.width > 1 else 0b1
+        row <<= max(j - 1, 0)
+        mask = 0
+
+        for ni in range(max(i - 1, 0), min(i + 2, self.height)):
+            mask |= row << (ni * self.width)
+
+        return mask & ~(1 << index)
+
+    def mask(self, cells):
+        bits = bytearray((self.size + 7) // 8)
+        
+        for cell in cells:
+            index = self.index(cell)
+            bits[index >> 3] |= 1 << (index & 7)
+            
+        return int.from_bytes(bits, "little")
+
+    def cells(self, bits):
+        return {self.cell(index) for index in set_bits(bits)}
+
+    def counts(self, bits):
+        width = self.width
+        west = (bits << 1) & self.not_first
+        east = (bits >> 1) & self.not_last
+        shifted = [
+            west, east,
+            bits << width, bits >> width,
+            west << width, west >> width,
+            east << width, east >> width
+        ]
+
+        planes = []
+        for carry in shifted:
+            carry &= self.full
+            
+            for k, plane in enumerate(planes):
+                planes[k], carry = plane ^ carry, plane & carry
+                
+            if carry:
+                planes.append(carry)
+
+        counts = [0] * self.size
+        for k, plane in enumerate(planes):
+            digits = bin(plane)[:1:-1]
+            index = digits.find("1")
+            
+            while index >= 0:
+                counts[index] += 1 << k
+                index = digits.find("1", index + 1)
+
+        return counts
+
 class Sentence():
     def __init__(self, cells, count):
         self.cells = set(cells)
@@ -56,7 +173,7 @@ class Sentence():
 
     def known_mines(self):
         if len(self.cells) == self.count and self.count > 0:
-            print('Mine Identified! - ', self.cells)
+            logger.debug('Mine Identified! - %s', self.cells)
             return self.cells
             
         return set()
@@ -76,30 +193,140 @@ class Sentence():
         if cell in self.cells:
             self.cells.remove(cell)
 
+class KnowledgeBase():
+    """Sentences keyed by their cell set, indexed by the cells they mention."""
+
+    sentence = Sentence
+
+    def __init__(self):
+        self.sentences = {}
+        self.index = {}
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        for cells, count in self.sentences.items():
+            yield self.sentence(cells, count)
+
+    def __contains__(self, cells):
+        return self.key(cells) in self.sentences
+
+    def __getitem__(self, cells):
+        return self.sentences[self.key(cells)]
+
+    def key(self, cells):
+        return frozenset(cells)
+
+    def members(self, cells):
+        return cells
+
+    def without(self, cells, cell):
+        return cells - {cell}
+
+    def items(self):
+        return self.sentences.items()
+
+    def add(self, cells, count):
+        cells = self.key(cells)
+        
+        if not cells or cells in self.sentences:
+            return False
+
+        self.sentences[cells] = count
+        
+        for cell in self.members(cells):
+            self.index.setdefault(cell, set()).add(cells)
+            
+        return True
+
+    def remove(self, cells):
+        del self.sentences[cells]
+        
+        for cell in self.members(cells):
+            bucket = self.index[cell]
+            bucket.discard(cells)
+            
+            if not bucket:
+                del self.index[cell]
+
+    def mark_mine(self, cell):
+        for cells in list(self.index.get(cell, ())):
+            count = self.sentences[cells]
+            self.remove(cells)
+            self.add(self.without(cells, cell), count - 1)
+
+    def mark_safe(self, cell):
+        for cells in list(self.index.get(cell, ())):
+            count = self.sentences[cells]
+            self.remove(cells)
+            self.add(self.without(cells, cell), count)
+
+    def supersets(self, cells):
+        buckets = sorted((self.index.get(cell, set()) for cell in self.members(cells)), key=len)
+        
+        if not buckets:
+            return set()
+
+        return buckets[0].intersection(*buckets[1:]) - {cells}
+
+    def known_mines(self):
+        mines = set()
+        
+        for cells, count in self.sentences.items():
+            if len(cells) == count:
+                logger.debug('Mine Identified! - %s', set(cells))
+                mines |= cells
+                
+        return mines
+
+    def known_safes(self):
+        safes = set()
+        
+        for cells, count in self.sentences.items():
+            if count == 0:
+                safes |= cells
+                
+        return safes
+
 class MinesweeperAI():
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8):
         self.height = height
         self.width = width
+        self.total_mines = mines
         self.moves_made = set()
         self.mines = set()
         self.safes = set()
-        self.knowledge = []
+        self.knowledge = KnowledgeBase()
 
     def mark_mine(self, cell):
         self.mines.add(cell)
-        
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.knowledge.mark_mine(cell)
 
     def mark_safe(self, cell):
         self.safes.add(cell)
-        
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.knowledge.mark_safe(cell)
 
     def add_knowledge(self, cell, count):
-        self.moves_made.add(cell)
-        self.mark_safe(cell)
+        self.add_knowledge_batch([(cell, count)])
+
+    def add_knowledge_batch(self, reveals):
+        for cell, _ in reveals:
+            self.moves_made.add(cell)
+            self.mark_safe(cell)
+
+        for cell, count in reveals:
+            self.add_sentence(cell, count)
+
+        self.infer()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Current AI KB length: %d', len(self.knowledge))
+            logger.debug('Known Mines: %s', self.mines)
+            logger.debug('Safe Moves Remaining: %s', self.safes - self.moves_made)
+            logger.debug('====================================================')
+
+    def add_sentence(self, cell, count):
         new_sentence_cells = set()
 
         for i in range(cell[0] - 1, cell[0] + 2):
@@ -115,19 +342,16 @@ class MinesweeperAI():
                     if 0 <= i < self.height and 0 <= j < self.width:
                         new_sentence_cells.add((i, j))
 
-        print(f'Move on cell: {cell} has added sentence to knowledge {new_sentence_cells} = {count}')
-        self.knowledge.append(Sentence(new_sentence_cells, count))
+        logger.debug('Move on cell: %s has added sentence to knowledge %s = %s', cell, new_sentence_cells, count)
+        self.knowledge.add(new_sentence_cells, count)
 
+    def infer(self):
         knowledge_changed = True
         
         while knowledge_changed:
             knowledge_changed = False
-            safes = set()
-            mines = set()
-
-            for sentence in self.knowledge:
-                safes |= sentence.known_safes()
-                mines |= sentence.known_mines()
+            safes = self.knowledge.known_safes()
+            mines = self.knowledge.known_mines()
 
             for safe in safes:
                 self.mark_safe(safe)
@@ -137,39 +361,30 @@ class MinesweeperAI():
                 self.mark_mine(mine)
                 knowledge_changed = True
 
-            self.knowledge = [s for s in self.knowledge if s.cells]
+            for cells, count in list(self.knowledge.items()):
+                if cells not in self.knowledge:
+                    continue
 
-            for s1 in self.knowledge:
-                for s2 in self.knowledge:
-                    if s1.cells == s2.cells or not s1.cells:
-                        continue
-                        
-                    if s1.cells.issubset(s2.cells):
-                        inferred = Sentence(s2.cells - s1.cells, s2.count - s1.count)
-                        
-                        if inferred not in self.knowledge:
-                            self.knowledge.append(inferred)
-                            knowledge_changed = True
-                            print('New Inferred Knowledge: ', inferred, 'from', s1, ' and ', s2)
-
-        print('Current AI KB length: ', len(self.knowledge))
-        print('Known Mines: ', self.mines)
-        print('Safe Moves Remaining: ', self.safes - self.moves_made)
-        print('====================================================')
+                for superset in self.knowledge.supersets(cells):
+                    inferred = superset - cells
+                    
+                    if self.knowledge.add(inferred, self.knowledge[superset] - count):
+                        knowledge_changed = True
+                        logger.debug('New Inferred Knowledge: %s = %s from %s and %s',
+                                     set(inferred), self.knowledge[inferred], set(cells), set(superset))
 
     def make_safe_move(self):
         safe_moves = self.safes - self.moves_made
         
         if safe_moves:
-            print('Making a Safe Move! Safe moves available: ', len(safe_moves))
+            logger.debug('Making a Safe Move! Safe moves available: %d', len(safe_moves))
             return random.choice(list(safe_moves))
             
         return None
 
     def make_random_move(self):
         moves = {}
-        MINES = 8
-        num_mines_left = MINES - len(self.mines)
+        num_mines_left = self.total_mines - len(self.mines)
         spaces_left = (self.height * self.width) - (len(self.moves_made) + len(self.mines))
         
         if spaces_left == 0:
@@ -184,7 +399,7 @@ class MinesweeperAI():
 
         if moves and not self.knowledge:
             move = random.choice(list(moves))
-            print('AI Selecting Random Move With Basic Probability: ', move)
+            logger.debug('AI Selecting Random Move With Basic Probability: %s', move)
             return move
 
         elif moves:
@@ -199,5 +414,162 @@ class MinesweeperAI():
             best_prob = best_moves[0][1]
             best_cells = [x[0] for x in best_moves if x[1] == best_prob]
             move = random.choice(best_cells)
-            print('AI Selecting Random Move with lowest mine probability using KB: ', move)
+            logger.debug('AI Selecting Random Move with lowest mine probability using KB: %s', move)
             return move
+
+class BitSentence():
+    def __init__(self, cells, count):
+        self.cells = cells
+        self.count = count
+
+    def __eq__(self, other):
+        return self.cells == other.cells and self.count == other.count
+
+class BitKnowledgeBase(KnowledgeBase):
+    """`KnowledgeBase` over int bitsets, remembering which sentences are new."""
+
+    sentence = BitSentence
+
+    def __init__(self):
+        super().__init__()
+        self.changed = set()
+
+    def key(self, cells):
+        return cells
+
+    def members(self, cells):
+        return set_bits(cells)
+
+    def without(self, cells, cell):
+        return cells & ~(1 << cell)
+
+    def add(self, cells, count):
+        if not super().add(cells, count):
+            return False
+
+        self.changed.add(cells)
+        return True
+
+    def subsets(self, cells):
+        overlapping = set()
+        
+        for cell in self.members(cells):
+            overlapping |= self.index.get(cell, set())
+
+        return {other for other in overlapping if other != cells and not other & ~cells}
+
+class BitMinesweeperAI():
+    """`MinesweeperAI` with every cell set held as an integer bitset."""
+
+    def __init__(self, height=8, width=8, mines=8):
+        self.height = height
+        self.width = width
+        self.total_mines = mines
+        self.grid = BitGrid(height, width)
+        self.moves_made_bits = 0
+        self.mine_bits = 0
+        self.safe_bits = 0
+        self.knowledge = BitKnowledgeBase()
+
+    @property
+    def moves_made(self):
+        return self.grid.cells(self.moves_made_bits)
+
+    @property
+    def mines(self):
+        return self.grid.cells(self.mine_bits)
+
+    @property
+    def safes(self):
+        return self.grid.cells(self.safe_bits)
+
+    def mark_mine(self, cell):
+        self.mark_mines(1 << self.grid.index(cell))
+
+    def mark_safe(self, cell):
+        self.mark_safes(1 << self.grid.index(cell))
+
+    def mark_mines(self, bits):
+        bits &= ~self.mine_bits
+        self.mine_bits |= bits
+        
+        for index in set_bits(bits):
+            self.knowledge.mark_mine(index)
+
+    def mark_safes(self, bits):
+        bits &= ~self.safe_bits
+        self.safe_bits |= bits
+        
+        for index in set_bits(bits):
+            self.knowledge.mark_safe(index)
+
+    def add_knowledge(self, cell, count):
+        self.add_knowledge_batch([(cell, count)])
+
+    def add_knowledge_batch(self, reveals):
+        revealed = self.grid.mask(cell for cell, _ in reveals)
+        self.moves_made_bits |= revealed
+        self.mark_safes(revealed)
+
+        for cell, count in reveals:
+            neighbours = self.grid.neighbours(self.grid.index(cell))
+            count -= (neighbours & self.mine_bits).bit_count()
+            cells = neighbours & ~self.mine_bits & ~self.safe_bits
+            self.knowledge.add(cells, count)
+
+        self.infer()
+
+    def infer(self):
+        knowledge = self.knowledge
+        
+        while knowledge.changed:
+            changed = knowledge.changed
+            knowledge.changed = set()
+
+            for cells in changed:
+                if cells not in knowledge.sentences:
+                    continue
+
+                count = knowledge.sentences[cells]
+                
+                if count == 0:
+                    self.mark_safes(cells)
+                    continue
+                    
+                if count == cells.bit_count():
+                    self.mark_mines(cells)
+                    continue
+
+                for superset in knowledge.supersets(cells):
+                    knowledge.add(superset & ~cells, knowledge.sentences[superset] - count)
+                    
+                for subset in knowledge.subsets(cells):
+                    knowledge.add(cells & ~subset, count - knowledge.sentences[subset])
+
+    def make_safe_move(self):
+        safe_moves = self.safe_bits & ~self.moves_made_bits
+        
+        if safe_moves:
+            return self.grid.cell((safe_moves & -safe_moves).bit_length() - 1)
+            
+        return None
+
+    def make_random_move(self):
+        candidates = self.grid.full & ~self.moves_made_bits & ~self.mine_bits
+        
+        if not candidates:
+            return None
+
+        basic_prob = (self.total_mines - self.mine_bits.bit_count()) / candidates.bit_count()
+        moves = {cell: basic_prob for cell in self.grid.cells(candidates)}
+
+        for sentence in self.knowledge:
+            prob = sentence.count / sentence.cells.bit_count()
+            
+            for cell in self.grid.cells(sentence.cells):
+                if moves[cell] < prob:
+                    moves[cell] = prob
+
+        best_prob = min(moves.values())
+        best_cells = [cell for cell, prob in moves.items() if prob == best_prob]
+        return random.choice(best_cells)
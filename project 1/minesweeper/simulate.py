@@ -0,0 +1,116 @@
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI, BitMinesweeperAI
+
+AIS = {
+    "set": MinesweeperAI,
+    "bit": BitMinesweeperAI
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Minesweeper AI benchmark")
+    parser.add_argument("configs", nargs="*", default=["8x8x8"],
+                        help="board configurations as HEIGHTxWIDTHxMINES")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--ai", choices=sorted(AIS), default="set")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log the AI's inference steps")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    results = []
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for config in args.configs:
+            try:
+                height, width, mines = (int(x) for x in config.lower().split("x"))
+            except ValueError:
+                sys.exit(f"Invalid board configuration: {config}")
+
+            jobs = [
+                (height, width, mines, args.ai, args.seed + game)
+                for game in range(args.games)
+            ]
+            games = list(pool.map(play_game, jobs, chunksize=max(1, args.games // 64)))
+            results.append(summarize(height, width, mines, args.ai, games))
+
+    print(json.dumps(results, indent=2))
+
+def play_game(job):
+    height, width, mines, ai_name, seed = job
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = AIS[ai_name](height=height, width=width, mines=mines)
+    revealed = set()
+    latencies = []
+    moves = 0
+
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+
+        if move is None:
+            move = ai.make_random_move()
+        elapsed = time.perf_counter() - start
+
+        if move is None or game.is_mine(move):
+            latencies.append(elapsed)
+            return {"won": move is None, "moves": moves, "latencies": latencies}
+
+        reveals = game.reveal(move, revealed)
+        revealed.update(cell for cell, _ in reveals)
+        start = time.perf_counter()
+        ai.add_knowledge_batch(reveals)
+        latencies.append(elapsed + time.perf_counter() - start)
+        moves += 1
+
+        if len(revealed) + mines == height * width or known_mines(ai) == mines:
+            return {"won": True, "moves": moves, "latencies": latencies}
+
+def known_mines(ai):
+    # Inference is sound, so the AI has found every mine once the counts match;
+    # this avoids expanding the bit AI's mine bitset into a set every move.
+    if isinstance(ai, BitMinesweeperAI):
+        return ai.mine_bits.bit_count()
+    return len(ai.mines)
+
+def summarize(height, width, mines, ai_name, games):
+    latencies = sorted(l for game in games for l in game["latencies"])
+    moves = [game["moves"] for game in games]
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    return {
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "ai": ai_name,
+        "games": len(games),
+        "win_rate": sum(game["won"] for game in games) / len(games),
+        "moves_per_game": {
+            "mean": statistics.mean(moves),
+            "max": max(moves)
+        },
+        "latency_ms": {
+            "p50": percentile(50),
+            "p90": percentile(90),
+            "p99": percentile(99),
+            "max": latencies[-1] * 1000 if latencies else 0.0
+        }
+    }
+
+if __name__ == "__main__":
+    main()
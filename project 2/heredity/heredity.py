@@ -1,7 +1,12 @@
+import argparse
 import csv
 import numpy as np
 import itertools
+import json
+import os
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 PROBS = {
     "gene": {
@@ -31,12 +36,69 @@ PROBS = {
 }
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    parser = argparse.ArgumentParser(description="Infer gene and trait probabilities for a family")
+    parser.add_argument("data", nargs="+", help="family CSV file(s)")
+    parser.add_argument("--method", choices=["exact", "enumerate", "vectorized", "likelihood", "gibbs"],
+                        default="exact",
+                        help="variable elimination (default), brute-force enumeration, "
+                             "enumeration as one batched NumPy product, or approximate "
+                             "likelihood weighting / Gibbs sampling")
+    parser.add_argument("--samples", type=int, default=10000,
+                        help="samples per chain for approximate methods")
+    parser.add_argument("--chains", type=int, default=4,
+                        help="independent chains for approximate methods, one per process")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="stop approximate sampling after this many seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch", action="store_true",
+                        help="treat every file (or every family id within a file) as a "
+                             "separate family and write one JSON line per family")
+    parser.add_argument("--family-column", default="family",
+                        help="column holding the family id in batch mode")
+    parser.add_argument("--output", default=None,
+                        help="JSON lines output file for batch mode (default stdout)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for batch mode")
+    args = parser.parse_args()
+
+    options = {
+        "samples": args.samples,
+        "chains": args.chains,
+        "deadline": args.deadline,
+        "seed": args.seed
+    }
+
+    if args.batch or len(args.data) > 1:
+        output = open(args.output, "w") if args.output else sys.stdout
         
-    people = load_data(sys.argv[1])
+        try:
+            run_batch(args.data, args.method, options, output, args.family_column, args.workers)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        return
+
+    people = load_data(args.data[0])
+    probabilities, diagnostics = infer(people, args.method, **options)
+
+    for key, value in diagnostics.items():
+        print(f"{key}: {value}", file=sys.stderr)
 
-    probabilities = {
+    print_probabilities(people, probabilities)
+
+def infer(people, method, samples=10000, chains=4, deadline=None, seed=None, workers=None):
+    """Run `method` on one family; return probabilities and diagnostics."""
+    if method == "enumerate":
+        return enumerate_probabilities(people), {}
+    elif method == "vectorized":
+        return vectorized_probabilities(people), {}
+    elif method in ("likelihood", "gibbs"):
+        return approximate_probabilities(people, method, samples, chains, deadline, seed, workers)
+    else:
+        return exact_probabilities(people), {}
+
+def empty_probabilities(people):
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -53,25 +115,133 @@ def main():
         for person in people
     }
 
-    names = set(people)
-    
-    for have_trait in powerset(names):
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-             for person in names
-        )
+def enumerate_probabilities(people):
+    probabilities = empty_probabilities(people)
+
+    for one_gene, two_genes, have_trait in assignments(people):
+        p = joint_probability(people, one_gene, two_genes, have_trait)
+        update(probabilities, one_gene, two_genes, have_trait, p)
+
+    normalize(probabilities)
+    return probabilities
+
+def assignments(people):
+    """Yield each evidence-consistent assignment, pruning impossible genes parents first."""
+    order = parents_first(people)
+    unknown = [name for name in order if people[name]["trait"] is None]
+    observed = {name for name in order if people[name]["trait"]}
+
+    for genes in gene_assignments(people, order, {}, inheritance_table()):
+        one_gene = {name for name, gene in genes.items() if gene == 1}
+        two_genes = {name for name, gene in genes.items() if gene == 2}
         
-        if fails_evidence:
+        for have_trait in lazy_powerset(unknown):
+            yield one_gene, two_genes, observed | have_trait
+
+def gene_assignments(people, order, genes, inheritance):
+    if len(genes) == len(order):
+        yield genes
+        return
+
+    name = order[len(genes)]
+    mother, father = people[name]["mother"], people[name]["father"]
+
+    for gene in range(3):
+        if mother is None and father is None:
+            p = PROBS["gene"][gene]
+        else:
+            p = inheritance[gene, genes.get(mother, 0), genes.get(father, 0)]
+            
+        if people[name]["trait"] is not None:
+            p *= PROBS["trait"][gene][people[name]["trait"]]
+
+        if p == 0:
             continue
 
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+        genes[name] = gene
+        yield from gene_assignments(people, order, genes, inheritance)
+        del genes[name]
 
-    normalize(probabilities)
+def parents_first(people):
+    order = []
+    visited = set()
+
+    def visit(name):
+        if name is None or name in visited:
+            return
+
+        visited.add(name)
+        visit(people[name]["mother"])
+        visit(people[name]["father"])
+        order.append(name)
+
+    for name in people:
+        visit(name)
+
+    return order
+
+def lazy_powerset(s):
+    s = list(s)
+    
+    for r in range(len(s) + 1):
+        for subset in itertools.combinations(s, r):
+            yield set(subset)
+
+def vectorized_probabilities(people):
+    """`enumerate_probabilities` as NumPy array lookups over all assignments."""
+    names = list(people)
+    column = {name: i for i, name in enumerate(names)}
+    n = len(names)
+
+    genes = np.indices((3,) * n).reshape(n, -1).T
+    unknown = [i for i, name in enumerate(names) if people[name]["trait"] is None]
+    traits = np.zeros((2 ** len(unknown), n), dtype=int)
+    traits[:, unknown] = np.indices((2,) * len(unknown)).reshape(len(unknown), 2 ** len(unknown)).T
+
+    for i, name in enumerate(names):
+        if people[name]["trait"] is not None:
+            traits[:, i] = int(people[name]["trait"])
+
+    prior = np.array([PROBS["gene"][gene] for gene in range(3)])
+    inheritance = inheritance_table()
+    trait_table = np.array([[PROBS["trait"][gene][False], PROBS["trait"][gene][True]]
+                            for gene in range(3)])
+    no_parent = np.zeros(len(genes), dtype=int)
+
+    gene_joint = np.ones(len(genes))
+    joint = np.ones((len(genes), len(traits)))
+
+    for i, name in enumerate(names):
+        mother, father = people[name]["mother"], people[name]["father"]
+
+        if mother is None and father is None:
+            gene_joint *= prior[genes[:, i]]
+        else:
+            from_mother = genes[:, column[mother]] if mother is not None else no_parent
+            from_father = genes[:, column[father]] if father is not None else no_parent
+            gene_joint *= inheritance[genes[:, i], from_mother, from_father]
+
+        joint *= trait_table[genes[:, i][:, np.newaxis], traits[np.newaxis, :, i]]
+
+    joint *= gene_joint[:, np.newaxis]
+    gene_weights = joint.sum(axis=1)
+    trait_weights = joint.sum(axis=0)
+    total = gene_weights.sum()
+    probabilities = empty_probabilities(people)
 
+    for i, name in enumerate(names):
+        by_gene = np.bincount(genes[:, i], weights=gene_weights, minlength=3) / total
+        has_trait = trait_weights[traits[:, i] == 1].sum() / total
+
+        for gene in range(3):
+            probabilities[name]["gene"][gene] = by_gene[gene]
+
+        probabilities[name]["trait"][True] = has_trait
+        probabilities[name]["trait"][False] = 1 - has_trait
+
+    return probabilities
+
+def print_probabilities(people, probabilities):
     for person in people:
         print(f"{person}:")
         
@@ -89,18 +259,92 @@ def load_data(filename):
         reader = csv.DictReader(f)
         
         for row in reader:
-            name = row["name"]
-            
-            data[name] = {
-                "name": name,
-                "mother": row["mother"] or None,
-                "father": row["father"] or None,
-                "trait": (True if row["trait"] == "1" else
-                          False if row["trait"] == "0" else None)
-            }
+            data[row["name"]] = parse_row(row)
             
     return data
 
+def parse_row(row):
+    return {
+        "name": row["name"],
+        "mother": row["mother"] or None,
+        "father": row["father"] or None,
+        "trait": (True if row["trait"] == "1" else
+                  False if row["trait"] == "0" else None)
+    }
+
+def stream_families(filenames, family_column="family"):
+    """Yield `(family_id, people)` for each contiguous family in `filenames`."""
+    for filename in filenames:
+        with open(filename) as f:
+            reader = csv.DictReader(f)
+
+            if family_column not in (reader.fieldnames or []):
+                yield filename, {row["name"]: parse_row(row) for row in reader}
+                continue
+
+            seen = set()
+            family, people = None, {}
+
+            for row in reader:
+                if row[family_column] != family:
+                    if people:
+                        yield family, people
+                        
+                    family, people = row[family_column], {}
+                    
+                    if family in seen:
+                        raise ValueError(f"{filename}: rows of family {family} are not contiguous")
+                        
+                    seen.add(family)
+
+                people[row["name"]] = parse_row(row)
+
+            if people:
+                yield family, people
+
+def family_result(job):
+    family, people, method, options = job
+    start = time.perf_counter()
+    probabilities, diagnostics = infer(people, method, workers=1, **options)
+
+    return {
+        "family": family,
+        "people": len(people),
+        "seconds": round(time.perf_counter() - start, 6),
+        "probabilities": {
+            name: {
+                "gene": {str(gene): float(p) for gene, p in fields["gene"].items()},
+                "trait": {str(trait).lower(): float(p) for trait, p in fields["trait"].items()}
+            }
+            for name, fields in probabilities.items()
+        },
+        **({"diagnostics": diagnostics} if diagnostics else {})
+    }
+
+def run_batch(filenames, method, options, output, family_column="family", workers=None):
+    """Write each family's marginals as a JSON line, computed in a process pool."""
+    families = stream_families(filenames, family_column)
+    workers = workers or os.cpu_count() or 1
+    limit = 4 * workers
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+
+        for family, people in families:
+            pending.add(pool.submit(family_result, (family, people, method, options)))
+
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_results(done, output)
+
+        write_results(pending, output)
+
+def write_results(futures, output):
+    for future in futures:
+        output.write(json.dumps(future.result()) + "\n")
+        
+    output.flush()
+
 def powerset(s):
     s = list(s)
     return [
@@ -176,5 +420,357 @@ def normalize(probabilities):
             for value in probabilities[person][field]:
                 probabilities[person][field][value] /= total
 
+def inheritance_table():
+    """`table[child, mother, father]`: P(child's gene count | parents' gene counts)."""
+    mutation = PROBS["mutation"]
+    passes = np.array([mutation, 0.5, 1 - mutation])
+    from_mother = passes[:, np.newaxis]
+    from_father = passes[np.newaxis, :]
+
+    return np.array([
+        (1 - from_mother) * (1 - from_father),
+        from_mother * (1 - from_father) + from_father * (1 - from_mother),
+        from_mother * from_father
+    ])
+
+def evidence_vector(person):
+    """P(observed trait | gene count), or ones if the trait is unknown."""
+    if person["trait"] is None:
+        return np.ones(3)
+
+    return np.array([PROBS["trait"][gene][person["trait"]] for gene in range(3)])
+
+def family_factors(people):
+    """One `(scope, table)` factor per person over gene counts."""
+    inheritance = inheritance_table()
+    prior = np.array([PROBS["gene"][gene] for gene in range(3)])
+    factors = []
+
+    for name, person in people.items():
+        evidence = evidence_vector(person)
+        mother, father = person["mother"], person["father"]
+
+        if mother is None and father is None:
+            factors.append(((name,), prior * evidence))
+            continue
+
+        table = inheritance * evidence[:, np.newaxis, np.newaxis]
+        scope = [name]
+
+        if mother is None:
+            table = table[:, 0:1, :]
+        else:
+            scope.append(mother)
+
+        if father is None:
+            table = table[:, :, 0]
+        else:
+            scope.append(father)
+
+        factors.append((tuple(scope), table.reshape((3,) * len(scope))))
+
+    return factors
+
+def multiply_and_sum(factors, keep):
+    """Multiply `factors`, sum out all but `keep`, and normalize."""
+    scopes = set(var for scope, _ in factors for var in scope)
+    factors = factors + [((var,), np.ones(3)) for var in keep if var not in scopes]
+    variables = list(dict.fromkeys(var for scope, _ in factors for var in scope))
+    axis = {var: i for i, var in enumerate(variables)}
+    keep = tuple(var for var in variables if var in keep)
+    operands = []
+
+    for scope, table in factors:
+        operands.extend([table, [axis[var] for var in scope]])
+
+    table = np.einsum(*operands, [axis[var] for var in keep])
+    total = table.sum()
+    return keep, table / total if total > 0 else table
+
+def elimination_order(people, factors):
+    graph = {name: set() for name in people}
+
+    for scope, _ in factors:
+        for var in scope:
+            graph[var].update(v for v in scope if v != var)
+
+    order = []
+
+    while graph:
+        var = min(graph, key=lambda v: len(graph[v]))
+        neighbors = graph.pop(var)
+        
+        for neighbor in neighbors:
+            graph[neighbor].discard(var)
+            graph[neighbor].update(n for n in neighbors if n != neighbor)
+            
+        order.append(var)
+
+    return order
+
+def exact_probabilities(people):
+    """Exact marginals by message passing on the elimination clique tree."""
+    factors = family_factors(people)
+    order = elimination_order(people, factors)
+    position = {var: i for i, var in enumerate(order)}
+
+    buckets = {var: [] for var in order}
+    
+    for scope, table in factors:
+        buckets[min(scope, key=position.get)].append((scope, table))
+
+    parent = {}
+    separator = {}
+    children = {var: [] for var in order}
+    upward = {}
+
+    for var in order:
+        incoming = [upward[child] for child in children[var]]
+        scope = set(v for s, _ in buckets[var] + incoming for v in s)
+        separator[var] = scope - {var}
+
+        if separator[var]:
+            upward[var] = multiply_and_sum(buckets[var] + incoming, separator[var])
+            parent[var] = min(separator[var], key=position.get)
+            children[parent[var]].append(var)
+
+    downward = {}
+    probabilities = empty_probabilities(people)
+
+    for var in reversed(order):
+        received = buckets[var] + ([downward[var]] if var in downward else [])
+
+        for child in children[var]:
+            others = [upward[c] for c in children[var] if c != child]
+            downward[child] = multiply_and_sum(received + others, separator[child])
+
+        _, marginal = multiply_and_sum(received + [upward[c] for c in children[var]], {var})
+        marginal = marginal / marginal.sum()
+
+        for gene in range(3):
+            probabilities[var]["gene"][gene] = marginal[gene]
+
+        trait = people[var]["trait"]
+        
+        for value in (True, False):
+            if trait is None:
+                probabilities[var]["trait"][value] = sum(
+                    marginal[gene] * PROBS["trait"][gene][value] for gene in range(3)
+                )
+            else:
+                probabilities[var]["trait"][value] = float(value == trait)
+
+    return probabilities
+
+class Pedigree():
+    """Family as arrays, parents first; column `n` stands in for missing parents."""
+
+    def __init__(self, people):
+        self.names = parents_first(people)
+        self.n = len(self.names)
+        column = {name: i for i, name in enumerate(self.names)}
+        column[None] = self.n
+
+        self.mother = np.array([column[people[name]["mother"]] for name in self.names])
+        self.father = np.array([column[people[name]["father"]] for name in self.names])
+        self.founder = (self.mother == self.n) & (self.father == self.n)
+        self.evidence = np.array([evidence_vector(people[name]) for name in self.names])
+        self.trait = np.array([[PROBS["trait"][gene][True] for gene in range(3)]])
+        self.prior = np.array([PROBS["gene"][gene] for gene in range(3)])
+        self.inheritance = inheritance_table()
+        self.children = [
+            [(c, "mother" if self.mother[c] == i else "father") for c in range(self.n)
+             if i in (self.mother[c], self.father[c])]
+            for i in range(self.n)
+        ]
+
+    def gene_probabilities(self, genes, i):
+        """P(gene of person `i` | parents) for each state, shape `(len(genes), 3)`."""
+        if self.founder[i]:
+            return np.broadcast_to(self.prior, (len(genes), 3))
+            
+        return self.inheritance[:, genes[:, self.mother[i]], genes[:, self.father[i]]].T
+
+def draw(rng, probabilities):
+    cumulative = probabilities.cumsum(axis=1)
+    u = rng.random(len(probabilities)) * cumulative[:, -1]
+    return (cumulative < u[:, np.newaxis]).sum(axis=1).clip(0, probabilities.shape[1] - 1)
+
+def likelihood_chain(pedigree, samples, deadline, seed, batch=1000):
+    """Likelihood weighting in log space; returns weighted counts and weight sums."""
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((pedigree.n, 3))
+    traits = np.zeros(pedigree.n)
+    total = squares = 0.0
+    scale = None
+    drawn = 0
+
+    while drawn < samples and (deadline is None or time.time() < deadline):
+        size = min(batch, samples - drawn)
+        genes = np.zeros((size, pedigree.n + 1), dtype=int)
+        log_weights = np.zeros(size)
+
+        for i in range(pedigree.n):
+            genes[:, i] = draw(rng, pedigree.gene_probabilities(genes, i))
+            log_weights += np.log(pedigree.evidence[i][genes[:, i]])
+
+        shift = log_weights.max()
+        
+        if scale is None or shift > scale:
+            if scale is not None:
+                rescale = np.exp(scale - shift)
+                counts *= rescale
+                traits *= rescale
+                total *= rescale
+                squares *= rescale ** 2
+                
+            scale = shift
+
+        weights = np.exp(log_weights - scale)
+        one_hot = np.eye(3)[genes[:, :pedigree.n]]
+        counts += np.einsum("s,sng->ng", weights, one_hot)
+        traits += weights @ pedigree.trait[0][genes[:, :pedigree.n]]
+        total += weights.sum()
+        squares += (weights ** 2).sum()
+        drawn += size
+
+    return {"counts": counts, "traits": traits, "weight": total,
+            "ess": total ** 2 / squares if squares else 0.0, "samples": drawn}
+
+def gibbs_chain(pedigree, samples, deadline, seed, walkers=32):
+    """Gibbs sampling of `walkers` states in lockstep; returns per-sweep gene counts."""
+    rng = np.random.default_rng(seed)
+    genes = np.zeros((walkers, pedigree.n + 1), dtype=int)
+
+    for i in range(pedigree.n):
+        genes[:, i] = draw(rng, pedigree.gene_probabilities(genes, i))
+
+    sweeps = max(1, samples // walkers)
+    burn_in = sweeps // 10
+    counts = np.zeros((pedigree.n, 3))
+    traits = np.zeros(pedigree.n)
+    history = []
+    kept = 0
+
+    for sweep in range(sweeps + burn_in):
+        if deadline is not None and time.time() >= deadline:
+            if kept:
+                break
+                
+            # Out of time during burn-in: keep this one sweep rather than none.
+            burn_in = sweep
+
+        for i in range(pedigree.n):
+            conditional = pedigree.gene_probabilities(genes, i) * pedigree.evidence[i]
+
+            for child, role in pedigree.children[i]:
+                other = genes[:, pedigree.father[child] if role == "mother" else pedigree.mother[child]]
+                table = pedigree.inheritance[genes[:, child]]
+                conditional = conditional * (table[np.arange(walkers), :, other] if role == "mother"
+                                             else table[np.arange(walkers), other, :])
+
+            genes[:, i] = draw(rng, conditional)
+
+        if sweep >= burn_in:
+            state = genes[:, :pedigree.n]
+            counts += np.eye(3)[state].sum(axis=0)
+            traits += pedigree.trait[0][state].sum(axis=0)
+            history.append(np.eye(3)[state].mean(axis=0))
+            kept += walkers
+
+    return {"counts": counts, "traits": traits, "weight": float(kept),
+            "history": np.array(history), "samples": kept}
+
+def run_chain(job):
+    people, method, samples, deadline, seed = job
+    pedigree = Pedigree(people)
+    chain = likelihood_chain if method == "likelihood" else gibbs_chain
+    return chain(pedigree, samples, deadline, seed)
+
+def approximate_probabilities(people, method="gibbs", samples=10000, chains=4,
+                              deadline=None, seed=None, workers=None):
+    """Sample `chains` chains in a process pool; return marginals and diagnostics."""
+    start = time.time()
+    stop = start + deadline if deadline is not None else None
+    seeds = np.random.SeedSequence(seed).spawn(chains)
+    jobs = [(people, method, samples, stop, seeds[c]) for c in range(chains)]
+
+    if chains == 1 or workers == 1:
+        results = [run_chain(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_chain, jobs))
+
+    pedigree = Pedigree(people)
+    usable = [r for r in results if r["weight"] > 0]
+    
+    if not usable:
+        raise ValueError("no samples drawn; increase --samples or --deadline")
+
+    chain_genes = np.array([r["counts"] / r["weight"] for r in usable])
+    chain_traits = np.array([r["traits"] / r["weight"] for r in usable])
+
+    if method == "likelihood":
+        # Chains are weighted by their effective sample size, not raw weight,
+        # since each chain's weights are on its own scale.
+        share = np.array([r["ess"] for r in usable])
+    else:
+        share = np.array([r["weight"] for r in usable])
+        
+    share = share / share.sum()
+    genes = np.einsum("c,cng->ng", share, chain_genes)
+    traits = share @ chain_traits
+
+    probabilities = empty_probabilities(people)
+    
+    for i, name in enumerate(pedigree.names):
+        for gene in range(3):
+            probabilities[name]["gene"][gene] = genes[i, gene]
+
+        trait = people[name]["trait"]
+        
+        if trait is None:
+            probabilities[name]["trait"][True] = traits[i]
+            probabilities[name]["trait"][False] = 1 - traits[i]
+        else:
+            probabilities[name]["trait"][trait] = 1.0
+
+    diagnostics = {
+        "method": method,
+        "chains": len(usable),
+        "samples": sum(r["samples"] for r in usable),
+        "seconds": round(time.time() - start, 3)
+    }
+    
+    if len(usable) > 1:
+        diagnostics["max_chain_stderr"] = float(
+            chain_genes.std(axis=0, ddof=1).max() / np.sqrt(len(usable))
+        )
+        
+    if method == "likelihood":
+        diagnostics["effective_samples"] = round(float(sum(r["ess"] for r in usable)), 1)
+    elif len(usable) > 1:
+        diagnostics["max_rhat"] = gelman_rubin([r["history"] for r in usable])
+
+    return probabilities, diagnostics
+
+def gelman_rubin(histories):
+    """Largest R-hat over every person and gene count."""
+    length = min(len(h) for h in histories)
+    
+    if length < 2:
+        return float("nan")
+
+    chains = np.array([h[:length] for h in histories])
+    means = chains.mean(axis=1)
+    within = chains.var(axis=1, ddof=1).mean(axis=0)
+    between = length * means.var(axis=0, ddof=1)
+    pooled = (length - 1) / length * within + between / length
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rhat = np.sqrt(np.where(within > 0, pooled / within, 1.0))
+        
+    return float(np.nanmax(rhat))
+
 if __name__ == "__main__":
     main()
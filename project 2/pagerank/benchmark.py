@@ -0,0 +1,85 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from pagerank import (DAMPING, SOLVERS, LinkGraph, crawl, personalized_pagerank,
+                      power_iteration, push_pagerank)
+
+CORPORA = ["corpus 0", "corpus 1", "corpus 2"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PageRank solvers")
+    parser.add_argument("--size", type=int, default=200000,
+                        help="pages in the synthetic graph (0 to skip it)")
+    parser.add_argument("--tolerance", type=float, default=1e-8)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per solver; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    graphs = [
+        (corpus, LinkGraph.from_corpus(crawl(os.path.join(os.path.dirname(__file__), corpus))))
+        for corpus in CORPORA
+    ]
+
+    if args.size:
+        graphs.append((f"synthetic {args.size}", synthetic_graph(args.size, args.seed)))
+
+    print(f"{'graph':<18} {'solver':<14} {'iterations':>10} {'ms':>10} {'residual':>10} {'error':>10}")
+
+    for name, graph in graphs:
+        exact, _ = power_iteration(graph, DAMPING, tolerance=1e-14, max_iterations=10000)
+
+        for solver in SOLVERS:
+            best = None
+
+            for _ in range(args.repeat):
+                trace = []
+                start = time.perf_counter()
+                rank, iterations = power_iteration(graph, DAMPING, tolerance=args.tolerance,
+                                                   solver=solver, trace=trace)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            error = np.abs(rank - exact).sum()
+            print(f"{name:<18} {solver:<14} {iterations:>10} {best * 1000:>10.2f} "
+                  f"{trace[-1]:>10.2e} {error:>10.2e}")
+
+    print()
+    print(f"{'graph':<18} {'push epsilon':<14} {'pages':>10} {'ms':>10} {'residual':>10} {'error':>10}")
+
+    for name, graph in graphs:
+        seed = int(np.argmax(graph.outdegree))
+        teleports = np.zeros((len(graph), 1))
+        teleports[seed] = 1
+        exact, _ = personalized_pagerank(graph, DAMPING, teleports, tolerance=1e-14,
+                                         max_iterations=10000)
+
+        for epsilon in [1e-4, 1e-6]:
+            start = time.perf_counter()
+            scores, residual = push_pagerank(graph, DAMPING, seed, epsilon, return_residual=True)
+            elapsed = time.perf_counter() - start
+            estimate = np.array([scores.get(page, 0.0) for page in graph.pages])
+            error = np.abs(exact[:, 0] - estimate).sum()
+            status = "" if error <= residual + 1e-9 else "  exceeds residual"
+            print(f"{name:<18} {epsilon:<14.0e} {len(scores):>10} {elapsed * 1000:>10.2f} "
+                  f"{residual:>10.2e} {error:>10.2e}{status}")
+
+def synthetic_graph(size, seed=0, dangling=0.2):
+    """
+    A badly connected graph: heavy-tailed outdegrees, links that prefer
+    low-numbered pages (so a few pages collect most of the rank), and a
+    fraction of pages with no links at all.
+    """
+    rng = np.random.default_rng(seed)
+    outdegree = np.minimum(rng.zipf(2.0, size), 1000)
+    outdegree[rng.random(size) < dangling] = 0
+    sources = np.repeat(np.arange(size), outdegree)
+    targets = (size * rng.random(len(sources)) ** 3).astype(np.int64)
+    return LinkGraph.from_edges([str(page) for page in range(size)],
+                                np.column_stack([sources, targets]))
+
+if __name__ == "__main__":
+    main()
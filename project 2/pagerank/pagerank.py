@@ -1,43 +1,201 @@
+import argparse
+import hashlib
+import json
 import os
+import posixpath
 import random
-import re
-import sys
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
 
 DAMPING = 0.85
 SAMPLES = 10000
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+STATE_VERSION = 1
+INDEX_MAGIC = b"PRGRAPH\0"
+INDEX_VERSION = 2
+INDEX_HEADER = "<8sIIQQQ20s4x"
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-        
-    corpus = crawl(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Compute PageRank for a corpus of HTML pages")
+    parser.add_argument("corpus", help="directory of .html pages")
+    parser.add_argument("--incremental", metavar="STATE",
+                        help="reuse and update the crawl and ranks persisted in STATE, "
+                             "re-parsing only pages that changed since the last run")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), default="jacobi",
+                        help="power-iteration scheme used for the iteration results")
+    parser.add_argument("--index", metavar="PATH",
+                        help="load the link graph from the binary index at PATH, "
+                             "crawling the corpus and writing PATH first if it is missing "
+                             "or older than the corpus")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes for parsing pages (0 for one per CPU)")
+    args = parser.parse_args()
+
+    if args.incremental:
+        ranks, stats = incremental_pagerank(args.corpus, DAMPING, args.incremental, args.solver)
+        print(f"PageRank Results from Incremental Iteration "
+              f"(+{stats['added']} -{stats['removed']} ~{stats['modified']} pages, "
+              f"{stats['iterations']} iterations)")
+
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        return
+
+    if args.index:
+        graph = load_or_build_index(args.corpus, args.index, args.processes)
+        ranks = walker_pagerank(graph, DAMPING, SAMPLES)
+        print(f"PageRank Results from Sampling (n = {SAMPLES})")
+
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+
+        rank, _ = power_iteration(graph, DAMPING, solver=args.solver)
+        ranks = graph.ranks(rank)
+        print(f"PageRank Results from Iteration")
+
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        return
+
+    corpus = crawl(args.corpus, processes=args.processes)
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
         
-    ranks = iterate_pagerank(corpus, DAMPING)
+    ranks = iterate_pagerank(corpus, DAMPING, args.solver)
     print(f"PageRank Results from Iteration")
     
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
-def crawl(directory):
-    pages = {}
+def load_or_build_index(directory, path, processes=1):
+    stale = not os.path.exists(path)
+
+    if not stale:
+        _, version, _, _, _, _, digest = read_index_header(path)
+        stale = version != INDEX_VERSION or digest != corpus_digest(directory)
+
+    if stale:
+        crawl(directory, index=path, processes=processes)
+        
+    return load_index(path)
+
+def corpus_digest(directory):
+    """SHA-1 over every page's name, size and modification time."""
+    digest = hashlib.sha1()
+
+    for page in list_pages(directory):
+        info = os.stat(os.path.join(directory, page))
+        digest.update(f"{page}\0{info.st_size}\0{info.st_mtime_ns}\n".encode())
+
+    return digest.digest()
+
+def crawl(directory, index=None, processes=1):
+    """Return each page's set of links, optionally writing the graph to `index`."""
+    digest = corpus_digest(directory) if index is not None else None
+    pages, edges = crawl_edges(directory, processes)
+    graph = LinkGraph.from_edges(pages, edges)
+
+    if index is not None:
+        save_index(index, graph, digest)
+
+    return graph.to_corpus()
 
-    for filename in os.listdir(directory):
-        if filename.endswith(".html"):
-            with open(os.path.join(directory, filename)) as f:
-                contents = f.read()
-                links = re.findall(r'<a\s+(?:[^>]*?)href="([^"]*)"', contents)
-                pages[filename] = set(links) - {filename}
+class LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = []
 
-    for filename in pages:
-        pages[filename] = {link for link in pages[filename] if link in pages}
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value:
+                    self.links.append(value)
+
+def extract_links(path, chunk_size=1 << 16):
+    parser = LinkParser()
+
+    with open(path, errors="replace") as f:
+        for chunk in iter(lambda: f.read(chunk_size), ""):
+            parser.feed(chunk)
+
+    parser.close()
+    return parser.links
+
+def resolve_link(page, href):
+    """Page name `href` on `page` points to, or None outside the corpus."""
+    url = urlsplit(href)
+    
+    if url.scheme or url.netloc or not url.path:
+        return None
+
+    if url.path.startswith("/"):
+        target = posixpath.normpath(url.path.lstrip("/"))
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(page), url.path))
+
+    if target == ".." or target.startswith("../"):
+        return None
+        
+    return target
+
+def parse_page(job):
+    directory, page = job
+    path = os.path.join(directory, *page.split("/"))
+    return {resolve_link(page, href) for href in extract_links(path)} - {None, page}
+
+def list_pages(directory):
+    pages = []
+
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        relative = os.path.relpath(root, directory)
+        
+        for filename in sorted(files):
+            if filename.endswith(".html"):
+                path = filename if relative == "." else os.path.join(relative, filename)
+                pages.append(path.replace(os.sep, "/"))
 
     return pages
 
+def crawl_edges(directory, processes=1):
+    """Sorted page names and an `(E, 2)` array of distinct in-corpus links."""
+    pages = list_pages(directory)
+    index = {page: k for k, page in enumerate(pages)}
+    jobs = [(directory, page) for page in pages]
+
+    if processes == 1:
+        edges = link_edges(map(parse_page, jobs), index)
+    else:
+        workers = processes or os.cpu_count() or 1
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            links = pool.map(parse_page, jobs, chunksize=max(1, len(jobs) // (4 * workers)))
+            edges = link_edges(links, index)
+
+    return pages, edges
+
+def link_edges(links, index):
+    edges = [
+        (source, index[target])
+        for source, targets in enumerate(links)
+        for target in targets if target in index
+    ]
+    return np.array(edges, dtype=np.int64).reshape(-1, 2)
+
 def transition_model(corpus, page, damping_factor):
     dist = {}
     links = corpus[page]
@@ -55,45 +213,543 @@ def transition_model(corpus, page, damping_factor):
     return dist
 
 def sample_pagerank(corpus, damping_factor, n):
-    page_rank = {page: 0 for page in corpus}
-    sample_page = random.choice(list(corpus.keys()))
+    pages = list(corpus)
+    links = {page: tuple(corpus[page]) for page in pages}
+    page_rank = dict.fromkeys(pages, 0)
+    sample_page = random.choice(pages)
 
     for _ in range(n):
         page_rank[sample_page] += 1
-        page_dist = transition_model(corpus, sample_page, damping_factor)
-        sample_page = random.choices(list(page_dist.keys()), weights=page_dist.values(), k=1)[0]
+        outgoing = links[sample_page]
+
+        if outgoing and random.random() < damping_factor:
+            sample_page = random.choice(outgoing)
+        else:
+            sample_page = random.choice(pages)
 
     return {page: rank / n for page, rank in page_rank.items()}
 
-def iterate_pagerank(corpus, damping_factor):
-    N = len(corpus)
-    page_rank = {page: 1 / N for page in corpus}
-    change = True
+def walker_pagerank(corpus, damping_factor, n, walkers=1000, processes=1, seed=None,
+                    return_error=False):
+    """Monte Carlo PageRank from many walkers; `return_error` excludes bias."""
+    graph = corpus if isinstance(corpus, LinkGraph) else LinkGraph.from_corpus(corpus)
+    steps = max(1, -(-n // walkers))
+    shards = max(1, min(processes, walkers))
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    burn_in = burn_in_steps(damping_factor)
+    jobs = [
+        (graph, damping_factor, walkers // shards + (k < walkers % shards), steps, seeds[k],
+         burn_in)
+        for k in range(shards)
+    ]
+
+    if shards == 1:
+        groups = [walk(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=shards) as pool:
+            groups = list(pool.map(walk, jobs))
+
+    groups = np.concatenate(groups)
+    visits = groups.sum(axis=0)
+    ranks = graph.ranks(visits / visits.sum())
+
+    if not return_error:
+        return ranks
+
+    frequencies = groups / groups.sum(axis=1, keepdims=True)
+    stderr = frequencies.std(axis=0, ddof=1) / np.sqrt(len(groups))
+    return ranks, graph.ranks(stderr)
+
+def burn_in_steps(damping_factor, tolerance=TOLERANCE):
+    """Steps after which a walk's start is forgotten to within `tolerance`."""
+    if not 0 < damping_factor < 1:
+        return 0
+    return int(np.ceil(np.log(tolerance) / np.log(damping_factor)))
+
+def walk(job, groups=16):
+    """Visit counts per page for up to `groups` groups of walkers."""
+    graph, damping_factor, walkers, steps, seed, burn_in = job
+    rng = np.random.default_rng(seed)
+    N = len(graph)
+    groups = max(1, min(groups, walkers))
+    group = np.arange(walkers) % groups
+    counts = np.zeros(groups * N, dtype=np.int64)
+    position = rng.integers(N, size=walkers)
+
+    for step in range(burn_in + steps):
+        if step >= burn_in:
+            counts += np.bincount(group * N + position, minlength=groups * N)
+        follow = (rng.random(walkers) < damping_factor) & ~graph.dangling[position]
+        jump = rng.integers(N, size=walkers)
+
+        if follow.any():
+            choice = (rng.random(follow.sum()) * graph.outdegree[position[follow]]).astype(np.int64)
+            jump[follow] = graph.indices[graph.indptr[position[follow]] + choice]
+
+        position = jump
+
+    return counts.reshape(groups, N)
+
+class LinkGraph():
+    """Links in CSR form: `pages[k]` links to `indices[indptr[k]:indptr[k + 1]]`."""
+
+    def __init__(self, pages, indptr, indices):
+        self.pages = pages
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.outdegree = np.diff(self.indptr)
+        self.dangling = self.outdegree == 0
+        self.sources = np.repeat(np.arange(len(pages)), self.outdegree)
+        self.transpose = None
+        self.reverse = None
+        self.ids = None
+
+    @classmethod
+    def from_edges(cls, pages, edges):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        edges = np.unique(edges, axis=0)
+        counts = np.bincount(edges[:, 0], minlength=len(pages))
+        indptr = np.concatenate([[0], np.cumsum(counts)])
+        return cls(list(pages), indptr, edges[:, 1])
+
+    def to_corpus(self):
+        return {
+            page: {self.pages[t] for t in self.indices[self.indptr[k]:self.indptr[k + 1]]}
+            for k, page in enumerate(self.pages)
+        }
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        pages = sorted(corpus)
+        index = {page: k for k, page in enumerate(pages)}
+        indptr = [0]
+        indices = []
+
+        for page in pages:
+            indices.extend(sorted(index[link] for link in corpus[page]))
+            indptr.append(len(indices))
+
+        return cls(pages, indptr, indices)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def propagate(self, rank, damping_factor, teleport=None):
+        """One power-iteration step for a rank vector or `(N, K)` matrix."""
+        N = len(self)
+        teleport = 1 / N if teleport is None else teleport
+        outdegree = self.outdegree.reshape((N,) + (1,) * (rank.ndim - 1))
+        share = np.zeros_like(rank)
+        np.divide(rank, outdegree, out=share, where=outdegree > 0)
+
+        linked = self.incoming(share)
+        dangling = rank[self.dangling].sum(axis=0) * teleport
+        return (1 - damping_factor) * teleport + damping_factor * (linked + dangling)
+
+    def incoming(self, share):
+        """Transposed adjacency matrix times `share`."""
+        N = len(self)
+
+        if sparse is not None:
+            return self.transpose_matrix() @ share
+
+        if share.ndim == 1:
+            return np.bincount(self.indices, weights=share[self.sources], minlength=N)
+
+        K = share.shape[1]
+        cells = (self.indices[:, np.newaxis] * K + np.arange(K)).ravel()
+        linked = np.bincount(cells, weights=share[self.sources].ravel(), minlength=N * K)
+        return linked.reshape(N, K)
+
+    def row_edges(self, rows):
+        """Target position in `rows` and source page of each link into `rows`."""
+        if self.reverse is None:
+            order = np.argsort(self.indices, kind="stable")
+            counts = np.bincount(self.indices, minlength=len(self))
+            self.reverse = (np.concatenate([[0], np.cumsum(counts)]), self.sources[order])
+
+        indptr, sources = self.reverse
+        starts = indptr[rows]
+        counts = indptr[rows + 1] - starts
+        owner = np.repeat(np.arange(len(rows)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return owner, sources[np.repeat(starts, counts) + offsets]
+
+    def transpose_matrix(self):
+        if self.transpose is None:
+            N = len(self)
+            self.transpose = sparse.csr_matrix(
+                (np.ones(len(self.indices)), (self.indices, self.sources)), shape=(N, N)
+            )
+            
+        return self.transpose
+
+    def page_ids(self):
+        if self.ids is None:
+            self.ids = {page: k for k, page in enumerate(self.pages)}
+
+        return self.ids
+
+    def ranks(self, rank):
+        return {page: float(rank[k]) for k, page in enumerate(self.pages)}
+
+class IncomingRows():
+    """`LinkGraph.incoming(share)` for the pages in `rows`, with their links gathered once."""
+
+    def __init__(self, graph, rows):
+        self.size = len(rows)
+
+        if sparse is not None:
+            self.matrix = graph.transpose_matrix()[rows]
+        else:
+            self.owner, self.sources = graph.row_edges(rows)
+
+    def __call__(self, share):
+        if sparse is not None:
+            return self.matrix @ share
+
+        return np.bincount(self.owner, weights=share[self.sources], minlength=self.size)
 
-    while change:
-        change = False
-        new_ranks = {}
+    def restrict(self, keep):
+        """Drop the rows where the boolean mask `keep` is False."""
+        if sparse is not None:
+            self.matrix = self.matrix[keep]
+        else:
+            position = np.cumsum(keep) - 1
+            links = keep[self.owner]
+            self.owner = position[self.owner[links]]
+            self.sources = self.sources[links]
+
+        self.size = int(keep.sum())
+        return self
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                    start=None, solver="jacobi", trace=None):
+    """Iterate with `solver` until the L1 change is below `tolerance`."""
+    if start is None:
+        rank = np.full(len(graph), 1 / len(graph))
+    else:
+        rank = np.asarray(start, dtype=float) / np.sum(start)
+
+    if trace is None:
+        trace = []
+
+    return SOLVERS[solver](graph, damping_factor, tolerance, max_iterations, rank, trace)
+
+def jacobi(graph, damping_factor, tolerance, max_iterations, rank, trace):
+    for iteration in range(1, max_iterations + 1):
+        new_rank = graph.propagate(rank, damping_factor)
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        trace.append(change)
+        
+        if change < tolerance:
+            break
+
+    return rank, iteration
+
+def gauss_seidel(graph, damping_factor, tolerance, max_iterations, rank, trace, blocks=64):
+    """Block Gauss-Seidel: each block sees the new ranks of earlier blocks."""
+    N = len(graph)
+    bounds = np.linspace(0, N, min(blocks, N) + 1).astype(np.int64)
+    plans = [IncomingRows(graph, np.arange(a, b)) for a, b in zip(bounds[:-1], bounds[1:])]
+    share = np.zeros(N)
+    linked = ~graph.dangling
+    rank = rank.copy()
+
+    for iteration in range(1, max_iterations + 1):
+        previous = rank.copy()
+        np.divide(rank, graph.outdegree, out=share, where=linked)
+        dangling = rank[graph.dangling].sum()
+
+        for a, b, plan in zip(bounds[:-1], bounds[1:], plans):
+            old = rank[a:b].copy()
+            rank[a:b] = (1 - damping_factor) / N + damping_factor * (plan(share) + dangling / N)
+            share[a:b] = np.where(linked[a:b], rank[a:b] / np.maximum(graph.outdegree[a:b], 1), 0)
+            dangling += (rank[a:b] - old)[graph.dangling[a:b]].sum()
+
+        rank /= rank.sum()
+        change = np.abs(rank - previous).sum()
+        trace.append(change)
+        
+        if change < tolerance:
+            break
+
+    return rank, iteration
+
+def adaptive(graph, damping_factor, tolerance, max_iterations, rank, trace, period=10):
+    """Adaptive PageRank: pages that changed by less than `tolerance / N` stop being updated."""
+    N = len(graph)
+    linked = ~graph.dangling
+    outdegree = np.maximum(graph.outdegree, 1)
+    plan = None
+
+    for iteration in range(1, max_iterations + 1):
+        if plan is None or since_full == period or not len(active):
+            new_rank = graph.propagate(rank, damping_factor)
+            delta = np.abs(new_rank - rank)
+            rank = new_rank
+            trace.append(delta.sum())
+
+            if delta.sum() < tolerance:
+                break
+
+            active = np.flatnonzero(delta >= tolerance / N)
+            plan = IncomingRows(graph, active)
+            share = np.where(linked, rank / outdegree, 0)
+            dangling = rank[graph.dangling].sum()
+            since_full = 0
+            continue
+
+        new = (1 - damping_factor) / N + damping_factor * (plan(share) + dangling / N)
+        change = new - rank[active]
+        rank[active] = new
+        share[active] = np.where(linked[active], new / outdegree[active], 0)
+        dangling += change[graph.dangling[active]].sum()
+        delta = np.abs(change)
+        trace.append(delta.sum())
+
+        keep = delta >= tolerance / N
+        active = active[keep]
+        plan.restrict(keep)
+        since_full += 1
+
+    return rank, iteration
+
+def extrapolation(graph, damping_factor, tolerance, max_iterations, rank, trace, period=10):
+    """Power iteration with quadratic extrapolation every `period` iterations."""
+    history = [rank]
+
+    for iteration in range(1, max_iterations + 1):
+        new_rank = graph.propagate(rank, damping_factor)
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        trace.append(change)
         
-        for page in corpus:
-            rank_sum = 0
+        if change < tolerance:
+            break
+
+        history = history[-3:] + [rank]
+
+        if iteration % period == 0 and len(history) == 4:
+            x3, x2, x1, x0 = history
+            y = np.column_stack([x2 - x3, x1 - x3])
+            gamma, *_ = np.linalg.lstsq(y, -(x0 - x3), rcond=None)
+            g1, g2, g3 = gamma[0], gamma[1], 1.0
+            extrapolated = (g1 + g2 + g3) * x2 + (g2 + g3) * x1 + g3 * x0
             
-            for possible_page in corpus:
-                if page in corpus[possible_page]:
-                    rank_sum += page_rank[possible_page] / len(corpus[possible_page])
-       
-                if len(corpus[possible_page]) == 0:
-                    rank_sum += page_rank[possible_page] / N
-                    
-            new_rank = (1 - damping_factor) / N + damping_factor * rank_sum
-            new_ranks[page] = new_rank
-
-        for page in page_rank:
-            if abs(new_ranks[page] - page_rank[page]) > 0.001:
-                change = True
-                
-            page_rank[page] = new_ranks[page]
-
-    return page_rank
+            if np.all(np.isfinite(extrapolated)) and extrapolated.sum() > 0:
+                rank = np.abs(extrapolated) / np.abs(extrapolated).sum()
+                history = [rank]
+
+    return rank, iteration
+
+SOLVERS = {
+    "jacobi": jacobi,
+    "gauss-seidel": gauss_seidel,
+    "adaptive": adaptive,
+    "extrapolation": extrapolation
+}
+
+def personalized_pagerank(graph, damping_factor, teleports, tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS):
+    """Personalized PageRank for every column of `teleports` at once."""
+    teleports = np.asarray(teleports, dtype=float)
+    totals = teleports.sum(axis=0)
+
+    if np.any(totals == 0):
+        raise ValueError(f"teleport columns with no mass: {np.flatnonzero(totals == 0).tolist()}")
+
+    teleports = teleports / totals
+    rank = teleports.copy()
+
+    for iteration in range(1, max_iterations + 1):
+        new_rank = graph.propagate(rank, damping_factor, teleports)
+        change = np.abs(new_rank - rank).sum(axis=0).max()
+        rank = new_rank
+
+        if change < tolerance:
+            break
+
+    return rank, iteration
+
+def seed_teleports(graph, seed_sets):
+    """Teleport matrix with one column per seed set."""
+    index = graph.page_ids()
+    teleports = np.zeros((len(graph), len(seed_sets)))
+
+    for column, seeds in enumerate(seed_sets):
+        teleports[[index[page] for page in seeds], column] = 1
+
+    return teleports
+
+def push_pagerank(graph, damping_factor, seed, epsilon=1e-6, return_residual=False):
+    """Local-push PageRank for `seed`; its L1 error is the unpushed residual."""
+    start = graph.page_ids()[seed] if isinstance(seed, str) else seed
+    estimate = {}
+    residual = {start: 1.0}
+    queue = deque([start])
+
+    while queue:
+        page = queue.popleft()
+        mass = residual.pop(page, 0.0)
+
+        if not mass:
+            continue
+
+        estimate[page] = estimate.get(page, 0.0) + (1 - damping_factor) * mass
+        degree = int(graph.outdegree[page])
+
+        if degree:
+            targets = graph.indices[graph.indptr[page]:graph.indptr[page + 1]]
+            share = damping_factor * mass / degree
+        else:
+            targets = (start,)
+            share = damping_factor * mass
+            degree = 1
+
+        for target in targets:
+            target = int(target)
+            before = residual.get(target, 0.0)
+            residual[target] = before + share
+            threshold = epsilon * max(1, int(graph.outdegree[target]))
+
+            if before < threshold <= residual[target]:
+                queue.append(target)
+
+    scores = {graph.pages[page]: score for page, score in estimate.items()}
+
+    if return_residual:
+        return scores, sum(residual.values())
+    return scores
+
+def iterate_pagerank(corpus, damping_factor, solver="jacobi"):
+    graph = LinkGraph.from_corpus(corpus)
+    rank, _ = power_iteration(graph, damping_factor, solver=solver)
+    return graph.ranks(rank)
+
+def save_index(path, graph, digest=bytes(20)):
+    """Write `graph` and its corpus digest as an 8-byte aligned binary index for `load_index`."""
+    names = [page.encode() for page in graph.pages]
+    name_offsets = np.concatenate([[0], np.cumsum([len(name) for name in names])]).astype("<i8")
+    header = struct.pack(INDEX_HEADER, INDEX_MAGIC, INDEX_VERSION, 0,
+                         len(graph), len(graph.indices), int(name_offsets[-1]), digest)
+    temporary = f"{path}.tmp"
+
+    with open(temporary, "wb") as f:
+        f.write(header)
+        f.write(np.asarray(graph.indptr, dtype="<i8").tobytes())
+        f.write(np.asarray(graph.indices, dtype="<i8").tobytes())
+        f.write(name_offsets.tobytes())
+        f.write(b"".join(names))
+
+    os.replace(temporary, path)
+
+def load_index(path):
+    """Memory-map a graph written by `save_index`."""
+    _, version, _, N, E, name_bytes, _ = read_index_header(path)
+        
+    if version != INDEX_VERSION:
+        raise ValueError(f"{path} has index version {version}, expected {INDEX_VERSION}")
+
+    offset = struct.calcsize(INDEX_HEADER)
+    indptr = np.memmap(path, dtype="<i8", mode="r", offset=offset, shape=(N + 1,))
+    offset += 8 * (N + 1)
+    indices = np.memmap(path, dtype="<i8", mode="r", offset=offset, shape=(E,)) if E else np.zeros(0, dtype=np.int64)
+    offset += 8 * E
+    name_offsets = np.memmap(path, dtype="<i8", mode="r", offset=offset, shape=(N + 1,))
+    offset += 8 * (N + 1)
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        blob = f.read(name_bytes)
+
+    pages = [blob[name_offsets[k]:name_offsets[k + 1]].decode() for k in range(N)]
+    return LinkGraph(pages, indptr, indices)
+
+def read_index_header(path):
+    with open(path, "rb") as f:
+        header = f.read(struct.calcsize(INDEX_HEADER))
+
+    if len(header) != struct.calcsize(INDEX_HEADER) or not header.startswith(INDEX_MAGIC):
+        raise ValueError(f"{path} is not a PageRank index")
+
+    return struct.unpack(INDEX_HEADER, header)
+
+def incremental_pagerank(directory, damping_factor, state_path, solver="jacobi"):
+    """Rank `directory`, re-parsing only pages changed since `state_path`."""
+    state = load_state(state_path)
+    previous = state["pages"]
+    pages = list_pages(directory)
+    records = {}
+    stats = {"added": 0, "removed": len(set(previous) - set(pages)), "modified": 0}
+
+    for page in pages:
+        path = os.path.join(directory, *page.split("/"))
+        info = os.stat(path)
+        record = previous.get(page)
+
+        if record is None:
+            stats["added"] += 1
+        elif (record["size"], record["mtime"]) == (info.st_size, info.st_mtime_ns):
+            records[page] = record
+            continue
+
+        digest = file_digest(path)
+        
+        if record is not None and record["hash"] == digest:
+            links = record["links"]
+        else:
+            links = sorted(parse_page((directory, page)))
+            stats["modified"] += record is not None
+
+        records[page] = {"size": info.st_size, "mtime": info.st_mtime_ns, "hash": digest, "links": links}
+
+    index = {page: k for k, page in enumerate(pages)}
+    edges = link_edges((records[page]["links"] for page in pages), index)
+    graph = LinkGraph.from_edges(pages, edges)
+
+    start = np.array([state["ranks"].get(page, 0.0) for page in pages])
+    unseen = start == 0
+    start[unseen] = 1 / len(pages)
+    
+    if not start[~unseen].sum():
+        start = None
+
+    rank, stats["iterations"] = power_iteration(graph, damping_factor, start=start, solver=solver)
+    ranks = graph.ranks(rank)
+    save_state(state_path, {"version": STATE_VERSION, "pages": records, "ranks": ranks})
+    return ranks, stats
+
+def file_digest(path):
+    digest = hashlib.sha1()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = None
+
+    if state is None or state.get("version") != STATE_VERSION:
+        return {"version": STATE_VERSION, "pages": {}, "ranks": {}}
+        
+    return state
+
+def save_state(path, state):
+    temporary = f"{path}.tmp"
+    
+    with open(temporary, "w") as f:
+        json.dump(state, f)
+        
+    os.replace(temporary, path)
 
 if __name__ == "__main__":
     main()
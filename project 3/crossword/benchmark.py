@@ -0,0 +1,72 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from crossword import Crossword
+from generate import SOLVERS
+
+VARIABLE_ORDERINGS = ["mrv", "mrv-degree", "dom-wdeg"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare crossword variable orderings")
+    parser.add_argument("words")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[9, 11, 13, 15],
+                        help="grid side lengths")
+    parser.add_argument("--grids", type=int, default=3,
+                        help="random structures per size")
+    parser.add_argument("--blocks", type=float, default=0.25,
+                        help="fraction of black cells")
+    parser.add_argument("--timeout", type=float, default=30,
+                        help="seconds per solve")
+    parser.add_argument("--domains", choices=sorted(SOLVERS), default="bitset")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    print(f"{'grid':<10} {'variables':<12} {'result':<10} {'nodes':>8} {'backtracks':>10} {'ms':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            for grid in range(args.grids):
+                structure = os.path.join(directory, f"{size}-{grid}.txt")
+                with open(structure, "w") as f:
+                    f.write(random_structure(size, args.blocks, rng))
+                crossword = Crossword(structure, args.words)
+                name = f"{size}x{size}-{grid}"
+
+                for variables in VARIABLE_ORDERINGS:
+                    solver = SOLVERS[args.domains](crossword)
+                    start = time.perf_counter()
+                    assignment = solver.solve(variables=variables,
+                                              deadline=time.time() + args.timeout)
+                    elapsed = time.perf_counter() - start
+
+                    if solver.timed_out:
+                        result = "timeout"
+                    elif assignment is None:
+                        result = "no fill"
+                    else:
+                        result = "solved"
+                    print(f"{name:<10} {variables:<12} {result:<10} "
+                          f"{solver.nodes:>8} {solver.backtracks:>10} {elapsed * 1000:>10.1f}")
+
+def random_structure(size, blocks, rng):
+    """
+    A square structure with rotationally symmetric black cells, as in
+    published crosswords.
+    """
+    cells = [[True] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(size):
+            if (i, j) <= (size - 1 - i, size - 1 - j) and rng.random() < blocks:
+                cells[i][j] = cells[size - 1 - i][size - 1 - j] = False
+    return "".join(
+        "".join("_" if cell else "#" for cell in row) + "\n"
+        for row in cells
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from bisect import bisect_left
+
+
 class Variable():
 
     ACROSS = "across"
@@ -108,26 +111,90 @@ class Crossword():
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only real overlaps are stored; other pairs look up as None.
+        self.overlaps = Overlaps()
+        crossings = dict()
+        for variable in self.variables:
+            for k, cell in enumerate(variable.cells):
+                crossings.setdefault(cell, []).append((variable, k))
+        for entries in crossings.values():
+            for v1, i in entries:
+                for v2, j in entries:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (i, j)
+
+        # Number the variables and record, for each one, its overlapping
+        # neighbors as (neighbor, i, j) triples
+        self.variable_list = sorted(
+            self.variables, key=lambda v: (v.i, v.j, v.direction)
+        )
+        self.ids = {var: k for k, var in enumerate(self.variable_list)}
+        self.adjacency = {var: [] for var in self.variables}
+        for (v1, v2), (i, j) in self.overlaps.items():
+            self.adjacency[v1].append((v2, i, j))
+        for var in self.variables:
+            self.adjacency[var].sort(key=lambda entry: self.ids[entry[0]])
+        self.neighbor_sets = {
+            var: frozenset(v for v, _, _ in self.adjacency[var])
+            for var in self.variables
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self.neighbor_sets[var]
+
+
+class Overlaps(dict):
+    """Overlap table that answers None for pairs that do not overlap."""
+
+    def __missing__(self, key):
+        return None
+
+
+class WordTable():
+    """
+    Vocabulary split into one sorted word tuple per length, with a bitmask
+    over each tuple for every (position, letter) pair, so that a set of
+    words of one length can be held as a single int.
+    """
+
+    def __init__(self, words, lengths=None):
+        self.buckets = dict()
+        self.masks = dict()
+        for word in sorted(words):
+            if lengths is None or len(word) in lengths:
+                self.buckets.setdefault(len(word), []).append(word)
+        for length in lengths or ():
+            self.buckets.setdefault(length, [])
+
+        for length, bucket in self.buckets.items():
+            self.buckets[length] = tuple(bucket)
+            positions = [dict() for _ in range(length)]
+            for index, word in enumerate(bucket):
+                for k, letter in enumerate(word):
+                    positions[k].setdefault(letter, []).append(index)
+            self.masks[length] = [
+                {letter: bitmask(indices, len(bucket))
+                 for letter, indices in letters.items()}
+                for letters in positions
+            ]
+
+    def full(self, length):
+        """Return the mask holding every word of `length`."""
+        return (1 << len(self.buckets.get(length, ()))) - 1
+
+    def index(self, word):
+        """Return the position of `word` in its bucket, or None."""
+        bucket = self.buckets.get(len(word), ())
+        index = bisect_left(bucket, word)
+        if index < len(bucket) and bucket[index] == word:
+            return index
+        return None
+
+
+def bitmask(indices, size):
+    """Return an int with the bits at `indices` set."""
+    bits = bytearray((size + 7) // 8)
+    for index in indices:
+        bits[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bits, "little")
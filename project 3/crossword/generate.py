@@ -1,5 +1,13 @@
-import sys
+import argparse
+import multiprocessing
+import os
+import random
 import copy
+import heapq
+import itertools
+import time
+from bisect import bisect_left
+from collections import Counter, deque
 
 from crossword import *
 
@@ -15,6 +23,26 @@ class CrosswordSolver():
             var: self.crossword.words.copy()
             for var in self.crossword.variables
         }
+        self.letter_counts = None
+        self.reset_search()
+
+    def reset_search(self):
+        """
+        Clear the trail, counters and options of the previous search.
+        """
+        self.trail = []
+        self.nodes = 0
+        self.backtracks = 0
+        self.restarts = 0
+        self.random = None
+        self.values = "lcv"
+        self.limit = None
+        self.deadline = None
+        self.timed_out = False
+        self.queue = None
+        self.weights = Counter()
+        self.variable_order = "mrv"
+        self.scope = None
 
     def letter_grid(self, assignment):
         """
@@ -86,142 +114,368 @@ class CrosswordSolver():
 
         img.save(filename)
 
-    def solve(self):
+    def solve(self, inference="mac", values="lcv", seed=None,
+              restart_base=None, deadline=None, variables="mrv"):
         """
         Enforce node and arc consistency, then solve CSP.
+
+        `inference` is "mac" (maintain arc consistency), "forward" (forward
+        checking) or "none" (plain `backtrack`). `values` is "lcv" or
+        "random" value ordering, and `variables` is "mrv", "mrv-degree"
+        or "dom-wdeg" (see `select_unassigned_variable`). A `seed` breaks
+        ordering ties at random.
+        With a `restart_base`, search restarts from the root after
+        `restart_base` times the next Luby number of backtracks. Search
+        gives up at `deadline` (a `time.time()` value), setting
+        `self.timed_out`.
+        """
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return None
+        self.start_search(values, seed, variables, deadline)
+        if inference == "none":
+            try:
+                return self.backtrack(dict())
+            except SearchLimit:
+                return None
+
+        while True:
+            if restart_base is not None:
+                self.limit = self.backtracks + restart_base * luby(self.restarts + 1)
+            self.queue = self.new_queue()
+            try:
+                return self.search(dict(), inference)
+            except SearchLimit:
+                self.undo(0)
+                if self.timed_out:
+                    return None
+                self.restarts += 1
+
+    def solutions(self, inference="mac", limit=None, values="lcv", seed=None,
+                  variables="mrv", deadline=None):
+        """
+        Yield distinct complete assignments, at most `limit` of them, as the
+        search finds them. Options are as for `solve`, without restarts.
         """
         self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        if not self.ac3():
+            return
+        self.start_search(values, seed, variables, deadline)
+        self.queue = self.new_queue()
+        try:
+            yield from itertools.islice(self.fills(dict(), inference), limit)
+        except SearchLimit:
+            return
+
+    def count_solutions(self, inference="mac", variables="mrv", deadline=None):
+        """
+        Count complete assignments, or return None if `deadline` passes.
+
+        Variables that do not cross, directly or through other variables,
+        and have no word length in common constrain each other in no way,
+        so each group from `independent_groups` is counted on its own and
+        the counts are multiplied.
+        """
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return 0
+        self.start_search("lcv", None, variables, deadline)
+
+        total = 1
+        try:
+            for group in self.independent_groups():
+                self.scope = set(group)
+                self.queue = self.new_queue()
+                total *= self.count(dict(), inference)
+                if total == 0:
+                    break
+        except SearchLimit:
+            return None
+        finally:
+            self.scope = None
+        return total
+
+    def independent_groups(self):
+        """
+        Split the variables into groups linked by overlaps or by sharing a
+        word length, each listed in `crossword.variable_list` order.
+        """
+        group_of = dict()
+        groups = []
+        by_length = dict()
+        for var in self.crossword.variable_list:
+            by_length.setdefault(var.length, []).append(var)
+
+        for start in self.crossword.variable_list:
+            if start in group_of:
+                continue
+            group = len(groups)
+            groups.append([])
+            group_of[start] = group
+            queue = deque([start])
+            while queue:
+                var = queue.popleft()
+                groups[group].append(var)
+                for other in itertools.chain(self.crossword.neighbors(var), by_length[var.length]):
+                    if other not in group_of:
+                        group_of[other] = group
+                        queue.append(other)
+
+        return [sorted(group, key=self.crossword.ids.get) for group in groups]
+
+    def start_search(self, values, seed, variables, deadline):
+        """
+        Reset the search and set its value ordering, tie-breaking seed,
+        variable ordering and deadline.
+        """
+        self.reset_search()
+        self.random = None if seed is None else random.Random(seed)
+        self.values = values
+        self.variable_order = variables
+        self.deadline = deadline
+
+    def new_queue(self):
+        """
+        Return a variable queue for the variable ordering and scope, or None
+        for plain MRV.
+        """
+        if self.variable_order == "mrv":
+            return None
+        if self.variable_order == "mrv-degree":
+            key = self.degree_key
+        else:
+            key = self.weighted_degree_key
+        return VariableQueue([
+            var for var in self.crossword.variable_list
+            if self.scope is None or var in self.scope
+        ], key)
 
     def enforce_node_consistency(self):
-    """
-    Ensure each variable is node-consistent.
-    """
-    for variable in self.domains:
-        length = variable.length
-        self.domains[variable] = {
-            word for word in self.domains[variable] if len(word) == length
-        }
+        """
+        Start each variable from every word of its length.
+        """
+        for variable in self.domains:
+            length = variable.length
+            self.domains[variable] = {
+                word for word in self.crossword.words if len(word) == length
+            }
+        self.letter_counts = None
+
+    def index_domains(self):
+        """
+        Count, for every variable, how many words in its domain have each
+        letter at each position, so support can be checked by lookup.
+        """
+        self.letter_counts = {}
+        for variable, domain in self.domains.items():
+            counts = Counter()
+            for word in domain:
+                counts.update(enumerate(word))
+            self.letter_counts[variable] = counts
+
+    def remove_value(self, var, word):
+        """
+        Remove `word` from the domain of `var`, keeping the letter counts
+        in step.
+        """
+        self.domains[var].remove(word)
+        self.trail.append((var, word))
+        if self.letter_counts is not None:
+            self.letter_counts[var].subtract(enumerate(word))
+
+    def undo(self, mark):
+        """
+        Restore every value removed since the trail was `mark` long.
+        """
+        while len(self.trail) > mark:
+            var, word = self.trail.pop()
+            self.domains[var].add(word)
+            if self.letter_counts is not None:
+                self.letter_counts[var].update(enumerate(word))
 
     def revise(self, x, y):
         """
         Make `x` arc-consistent with `y`.
         """
         overlap = self.crossword.overlaps[x, y]
-    if overlap is None:
-        return False
-    
-    xoverlap, yoverlap = overlap
-    revision_made = False
-
-    for xword in list(self.domains[x]):
-        matched = any(
-            xword[xoverlap] == yword[yoverlap]
-            for yword in self.domains[y]
-        )
-        
-        if not matched:
-            self.domains[x].remove(xword)
-            revision_made = True
+        if overlap is None:
+            return False
 
-    return revision_made
+        if self.letter_counts is None:
+            self.index_domains()
 
-    def ac3(self, arcs=None):
-    """
-    Enforce arc consistency.
-    """
-queue = arcs if arcs is not None else [
-        (var1, var2)
-        for var1 in self.domains
-        for var2 in self.crossword.neighbors(var1)
-        if self.crossword.overlaps[var1, var2] is not None
-    ]
+        xoverlap, yoverlap = overlap
+        support = self.letter_counts[y]
+        revision_made = False
 
-    while queue:
-        x, y = queue.pop(0)
-        
-        if self.revise(x, y):
-            if not self.domains[x]:
-                return False
-                
-            for neighbor in self.crossword.neighbors(x):
-                if neighbor != y:
-                    queue.append((neighbor, x))
-                    
-    return True
+        for xword in list(self.domains[x]):
+            if support[yoverlap, xword[xoverlap]] <= 0:
+                self.remove_value(x, xword)
+                revision_made = True
+
+        return revision_made
+
+    def ac3(self, arcs=None):
+        """
+        Enforce arc consistency.
+        """
+        if arcs is None:
+            arcs = [
+                (var1, var2)
+                for var1 in self.domains
+                for var2 in self.crossword.neighbors(var1)
+            ]
+
+        queue = deque()
+        queued = set()
+        for arc in arcs:
+            if arc not in queued:
+                queue.append(arc)
+                queued.add(arc)
+
+        while queue:
+            x, y = queue.popleft()
+            queued.discard((x, y))
+
+            if self.revise(x, y):
+                if not self.domains[x]:
+                    self.conflict(x, y)
+                    return False
+
+                for neighbor in self.crossword.neighbors(x):
+                    if neighbor != y and (neighbor, x) not in queued:
+                        queue.append((neighbor, x))
+                        queued.add((neighbor, x))
+
+        return True
 
     def assignment_complete(self, assignment):
         """
         Check if `assignment` is complete.
         """
-        return all(variable in assignment for variable in self.domains)
+        return all(variable in assignment for variable in self.scope or self.domains)
 
     def consistent(self, assignment):
-    """
-    Check if `assignment` is consistent.
-    """
-    words = list(assignment.values())
-    
-    if len(words) != len(set(words)):
-        return False
+        """
+        Check if `assignment` is consistent.
+        """
+        words = list(assignment.values())
 
-    for variable in assignment:
-        if variable.length != len(assignment[variable]):
+        if len(words) != len(set(words)):
             return False
 
-        for neighbor in self.crossword.neighbors(variable):
-            if neighbor in assignment:
-                overlap = self.crossword.overlaps[variable, neighbor]
-                
-                if overlap is not None:
-                    x, y = overlap
-                    
+        for variable in assignment:
+            if variable.length != len(assignment[variable]):
+                return False
+
+            for neighbor, x, y in self.crossword.adjacency[variable]:
+                if neighbor in assignment:
                     if assignment[variable][x] != assignment[neighbor][y]:
                         return False
-                        
-    return True
+
+        return True
 
     def order_domain_values(self, var, assignment):
         """
         Order values for `var` based on constraints.
+
+        A word rules out every word of an unassigned neighbor that has a
+        different letter at the overlap, i.e. the neighbor's domain size
+        minus its count of the word's letter there, read from the letter
+        counts.
         """
+        if self.letter_counts is None:
+            self.index_domains()
+
         word_dict = {}
-        neighbors = self.crossword.neighbors(var)
+        neighbors = [
+            (len(self.domains[neighbor]), self.letter_counts[neighbor], xoverlap, yoverlap)
+            for neighbor, xoverlap, yoverlap in self.crossword.adjacency[var]
+            if neighbor not in assignment
+        ]
 
-        for word in self.domains[var]:
-            eliminated = 0
-            
-            for neighbor in neighbors:
-                if neighbor in assignment:
-                    continue
-                    
-                xoverlap, yoverlap = self.crossword.overlaps[var, neighbor]
-                
-                for neighbor_word in self.domains[neighbor]:
-                    if word[xoverlap] != neighbor_word[yoverlap]:
-                        eliminated += 1
-                        
-            word_dict[word] = eliminated
+        for word in self.domain_values(var):
+            word_dict[word] = sum(
+                size - counts[yoverlap, word[xoverlap]]
+                for size, counts, xoverlap, yoverlap in neighbors
+            )
 
         sorted_dict = {k: v for k, v in sorted(word_dict.items(), key=lambda item: item[1])}
         
         return list(sorted_dict)
 
+    def domain_values(self, var):
+        """
+        List the domain of `var`, shuffled when ties are broken at random.
+        """
+        values = list(self.domains[var])
+        if self.random is not None:
+            self.random.shuffle(values)
+        return values
+
     def select_unassigned_variable(self, assignment):
         """
         Choose an unassigned variable.
+
+        Without a queue this sorts by domain size (MRV). Otherwise the
+        variable queue returns the variable with the smallest key: domain
+        size then most unassigned neighbors ("mrv-degree"), or domain size
+        over the summed weights of constraints to unassigned neighbors,
+        where a constraint gains weight each time it wipes out a domain
+        ("dom-wdeg").
         """
+        if self.queue is not None:
+            return self.queue.pop(assignment)
+
         choice_dict = {
             var: self.domains[var]
-            for var in self.domains if var not in assignment
+            for var in self.scope or self.domains if var not in assignment
         }
+        if self.random is not None:
+            ties = {var: self.random.random() for var in choice_dict}
+            return min(choice_dict, key=lambda v: (len(choice_dict[v]), ties[v]))
         sorted_list = sorted(choice_dict, key=lambda v: len(choice_dict[v]))
         return sorted_list[0]
 
+    def degree_key(self, var, assignment):
+        """
+        Order by fewest remaining values, then most unassigned neighbors.
+        """
+        degree = sum(
+            1 for neighbor in self.crossword.neighbors(var)
+            if neighbor not in assignment
+        )
+        return (len(self.domains[var]), -degree, self.tie_break())
+
+    def weighted_degree_key(self, var, assignment):
+        """
+        Order by remaining values per unit of weighted degree.
+        """
+        weight = sum(
+            1 + self.weights[var, neighbor]
+            for neighbor in self.crossword.neighbors(var)
+            if neighbor not in assignment
+        )
+        return (len(self.domains[var]) / max(weight, 1), self.tie_break())
+
+    def tie_break(self):
+        """
+        Return a random tie-breaker when ties are broken at random, else 0.
+        """
+        return 0 if self.random is None else self.random.random()
+
+    def conflict(self, x, y):
+        """
+        Record that the constraint between `x` and `y` wiped out a domain.
+        """
+        self.weights[x, y] += 1
+        self.weights[y, x] += 1
+        if self.queue is not None:
+            self.queue.update((x, y))
+
     def backtrack(self, assignment):
         """
-        Solve CSP via backtracking.
+        Solve CSP via backtracking. Raises `SearchLimit` past the deadline.
         """
         if self.assignment_complete(assignment):
             return assignment
@@ -229,6 +483,10 @@ queue = arcs if arcs is not None else [
         var = self.select_unassigned_variable(assignment)
 
         for value in self.domains[var]:
+            self.nodes += 1
+            if self.deadline is not None and time.time() > self.deadline:
+                self.timed_out = True
+                raise SearchLimit()
             assignment_copy = assignment.copy()
             assignment_copy[var] = value
             
@@ -237,27 +495,497 @@ queue = arcs if arcs is not None else [
                 
                 if result is not None:
                     return result
+
+            self.backtracks += 1
                     
         return None
 
-def main():
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+    def consistent_value(self, var, value, assignment):
+        """
+        Check `value` for `var` against the variables already assigned,
+        assuming the rest of `assignment` is consistent.
+        """
+        if var.length != len(value) or value in assignment.values():
+            return False
+        for neighbor, x, y in self.crossword.adjacency[var]:
+            if neighbor in assignment:
+                if value[x] != assignment[neighbor][y]:
+                    return False
+        return True
+
+    def search(self, assignment, inference="mac"):
+        """
+        Solve CSP via backtracking, propagating each assignment into the
+        domains of unassigned neighbors by forward checking or by
+        maintaining arc consistency. Pruned values are recorded on
+        `self.trail` and undone on backtrack rather than copied. Counts
+        tried values in `self.nodes` and failed ones in `self.backtracks`.
+        Raises `SearchLimit` past the backtrack limit or the deadline.
+        The domains are restored once the first fill is found.
+        """
+        mark = len(self.trail)
+        fills = self.fills(assignment, inference)
+        try:
+            return next(fills, None)
+        finally:
+            fills.close()
+            self.undo(mark)
+
+    def fills(self, assignment, inference="mac"):
+        """
+        Yield a copy of each complete extension of `assignment`.
+        """
+        if self.assignment_complete(assignment):
+            yield dict(assignment)
+            return
+
+        var = self.select_unassigned_variable(assignment)
+        for _ in self.branches(var, assignment, inference):
+            yield from self.fills(assignment, inference)
+
+    def count(self, assignment, inference="mac"):
+        """
+        Count the complete extensions of `assignment`. Once one variable is
+        left, propagation has already pruned its domain against every
+        neighbor, so only words used elsewhere need to be discounted.
+        """
+        unassigned = [
+            var for var in self.scope or self.domains if var not in assignment
+        ]
+        if not unassigned:
+            return 1
+        if len(unassigned) == 1:
+            domain = self.domains[unassigned[0]]
+            return len(domain) - sum(word in domain for word in set(assignment.values()))
+
+        var = self.select_unassigned_variable(assignment)
+        return sum(
+            self.count(assignment, inference)
+            for _ in self.branches(var, assignment, inference)
+        )
+
+    def branches(self, var, assignment, inference="mac"):
+        """
+        Assign each value of `var` in turn, in search order, propagate it and
+        yield while the domains are still consistent; undo the assignment
+        when resumed.
+        """
+        if self.values == "random":
+            values = self.domain_values(var)
+        else:
+            values = self.order_domain_values(var, assignment)
+
+        for value in values:
+            self.nodes += 1
+            if self.deadline is not None and time.time() > self.deadline:
+                self.timed_out = True
+                raise SearchLimit()
+            if not self.consistent_value(var, value, assignment):
+                continue
+
+            mark = len(self.trail)
+            assignment[var] = value
+            self.assign(var, value)
+            consistent = self.propagate(var, assignment, inference)
+
+            if self.queue is not None:
+                changed = {changed_var for changed_var, _ in self.trail[mark:]}
+                changed.update(self.crossword.neighbors(var))
+                self.queue.update(changed)
+
+            if consistent:
+                yield value
+
+            del assignment[var]
+            self.undo(mark)
+            self.backtracks += 1
+            if self.queue is not None:
+                changed.add(var)
+                self.queue.update(changed)
+            if self.limit is not None and self.backtracks >= self.limit:
+                raise SearchLimit()
+
+    def assign(self, var, value):
+        """
+        Reduce the domain of `var` to `value`, recording removals on the trail.
+        """
+        for word in list(self.domains[var]):
+            if word != value:
+                self.remove_value(var, word)
+
+    def propagate(self, var, assignment, inference):
+        """
+        Prune neighbor domains after assigning `var`; return False if some
+        domain is wiped out.
+        """
+        neighbors = [
+            neighbor for neighbor in self.crossword.neighbors(var)
+            if neighbor not in assignment
+        ]
+        if inference == "mac":
+            return self.ac3([(neighbor, var) for neighbor in neighbors])
+        for neighbor in neighbors:
+            self.revise(neighbor, var)
+            if not self.domains[neighbor]:
+                self.conflict(neighbor, var)
+                return False
+        return True
+
+class SearchLimit(Exception):
+    """Raised to abandon a search at its restart limit or deadline."""
+
+
+class VariableQueue():
+    """
+    Heap of variables ordered by `key(var, assignment)`. Variables whose key
+    may have changed are marked with `update` and pushed again, with their
+    new key, before the next `pop`; entries left behind are skipped.
+    """
+
+    def __init__(self, variables, key):
+        self.key = key
+        self.ids = {var: k for k, var in enumerate(variables)}
+        self.stamps = dict.fromkeys(variables, 0)
+        self.heap = []
+        self.dirty = set(variables)
+
+    def update(self, variables):
+        """Mark `variables` for re-keying."""
+        self.dirty.update(variables)
+
+    def pop(self, assignment):
+        """Return the unassigned variable with the smallest key."""
+        if len(self.heap) > 4 * len(self.stamps):
+            self.heap = [
+                entry for entry in self.heap
+                if entry[2] == self.stamps[entry[3]]
+            ]
+            heapq.heapify(self.heap)
+
+        for var in self.dirty:
+            if var not in assignment:
+                self.stamps[var] += 1
+                heapq.heappush(self.heap, (
+                    self.key(var, assignment), self.ids[var], self.stamps[var], var
+                ))
+        self.dirty.clear()
+
+        while self.heap:
+            _, _, stamp, var = self.heap[0]
+            if var in assignment or stamp != self.stamps[var]:
+                heapq.heappop(self.heap)
+                continue
+            return var
+        return None
+
+
+def luby(i):
+    """
+    Return the `i`th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class BitDomain():
+    """
+    Immutable set of words of one length, held as a bitmask over the
+    matching bucket of a `WordTable`.
+    """
+
+    __slots__ = ("words", "mask")
+
+    def __init__(self, words, mask):
+        self.words = words
+        self.mask = mask
+
+    def restrict(self, mask):
+        """Return the domain intersected with `mask`."""
+        return BitDomain(self.words, self.mask & mask)
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __iter__(self):
+        bits = bin(self.mask)[:1:-1]
+        index = bits.find("1")
+        while index >= 0:
+            yield self.words[index]
+            index = bits.find("1", index + 1)
+
+    def __contains__(self, word):
+        index = bisect_left(self.words, word)
+        return (
+            index < len(self.words) and self.words[index] == word
+            and self.mask >> index & 1 == 1
+        )
+
+
+class BitsetSolver(CrosswordSolver):
+    """
+    Crossword solver whose domains are bitmasks over one shared, length
+    bucketed word table instead of per-variable copies of the vocabulary.
+    Revising an arc is a handful of ANDs and ORs, and the trail stores
+    whole previous domains, so undoing is an int assignment.
+    """
+
+    def __init__(self, crossword):
+        self.crossword = crossword
+        self.table = WordTable(
+            crossword.words, {var.length for var in crossword.variables}
+        )
+        self.domains = dict()
+        self.enforce_node_consistency()
+        self.reset_search()
+
+    def enforce_node_consistency(self):
+        """
+        Start each variable from every word of its length.
+        """
+        for variable in self.crossword.variables:
+            length = variable.length
+            self.domains[variable] = BitDomain(
+                self.table.buckets[length], self.table.full(length)
+            )
+
+    def index_domains(self):
+        """
+        Letter masks are precomputed by the word table; nothing to index.
+        """
+
+    def restrict(self, var, mask):
+        """
+        Intersect the domain of `var` with `mask`; return whether it shrank.
+        """
+        domain = self.domains[var]
+        if domain.mask & mask == domain.mask:
+            return False
+        self.trail.append((var, domain))
+        self.domains[var] = domain.restrict(mask)
+        return True
+
+    def remove_value(self, var, word):
+        """
+        Remove `word` from the domain of `var`.
+        """
+        if word in self.domains[var]:
+            self.restrict(var, ~(1 << self.table.index(word)))
+
+    def assign(self, var, value):
+        """
+        Reduce the domain of `var` to `value`.
+        """
+        self.restrict(var, 1 << self.table.index(value))
+
+    def undo(self, mark):
+        """
+        Restore every domain changed since the trail was `mark` long.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
+
+    def letter_support(self, var, position):
+        """
+        Count the words in the domain of `var` with each letter at `position`.
+        """
+        mask = self.domains[var].mask
+        return {
+            letter: (mask & letter_mask).bit_count()
+            for letter, letter_mask in self.table.masks[var.length][position].items()
+        }
+
+    def revise(self, x, y):
+        """
+        Make `x` arc-consistent with `y`: keep the words of `x` whose letter
+        at the overlap is found at the same place in some word of `y`.
+        """
+        overlap = self.crossword.overlaps[x, y]
+        if overlap is None:
+            return False
+
+        xoverlap, yoverlap = overlap
+        xmasks = self.table.masks[x.length][xoverlap]
+        ymask = self.domains[y].mask
+        allowed = 0
+        for letter, letter_mask in self.table.masks[y.length][yoverlap].items():
+            if ymask & letter_mask:
+                allowed |= xmasks.get(letter, 0)
 
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+        return self.restrict(x, allowed)
 
-    crossword = Crossword(structure, words)
-    solver = CrosswordSolver(crossword)
-    assignment = solver.solve()
+    def order_domain_values(self, var, assignment):
+        """
+        Order values for `var` based on constraints, counting the words each
+        value rules out from popcounts of the neighbors' letter masks.
+        """
+        neighbors = [
+            (len(self.domains[neighbor]), self.letter_support(neighbor, yoverlap), xoverlap)
+            for neighbor, xoverlap, yoverlap in self.crossword.adjacency[var]
+            if neighbor not in assignment
+        ]
+
+        word_dict = {
+            word: sum(
+                size - counts.get(word[xoverlap], 0)
+                for size, counts, xoverlap in neighbors
+            )
+            for word in self.domain_values(var)
+        }
+
+        return sorted(word_dict, key=word_dict.get)
+
+
+SOLVERS = {
+    "set": CrosswordSolver,
+    "bitset": BitsetSolver
+}
+
+RESTART_BASE = 100
+
+def portfolio_configs(size, domains="bitset"):
+    """
+    Return `size` solver configurations: the deterministic default first,
+    then randomized variants with Luby restarts, cycling over variable
+    ordering, inference and value ordering.
+    """
+    configs = [dict(domains=domains, inference="mac", values="lcv",
+                    variables="dom-wdeg", seed=None, restart_base=None)]
+    variants = [
+        ("dom-wdeg", "mac", "lcv"),
+        ("mrv", "mac", "lcv"),
+        ("mrv-degree", "forward", "lcv"),
+        ("dom-wdeg", "mac", "random"),
+        ("mrv-degree", "mac", "lcv"),
+        ("dom-wdeg", "forward", "random")
+    ]
+    for k in range(1, size):
+        variables, inference, values = variants[(k - 1) % len(variants)]
+        configs.append(dict(domains=domains, inference=inference, values=values,
+                            variables=variables, seed=k, restart_base=RESTART_BASE))
+    return configs
+
+def solve_config(job):
+    """
+    Solve the puzzle with one portfolio configuration.
+    """
+    structure, words, config, deadline = job
+    options = dict(config)
+    solver = SOLVERS[options.pop("domains")](Crossword(structure, words))
+    assignment = solver.solve(deadline=deadline, **options)
+    return {
+        "config": config,
+        "assignment": assignment,
+        "timed_out": solver.timed_out,
+        "nodes": solver.nodes,
+        "backtracks": solver.backtracks,
+        "restarts": solver.restarts
+    }
+
+def portfolio(structure, words, configs, timeout=None, workers=None):
+    """
+    Run each configuration in a process pool and return the first result
+    that settles the puzzle, with a solution or with proof that there is
+    none; the other workers are terminated. Returns None if every
+    configuration runs out of time.
+    """
+    deadline = None if timeout is None else time.time() + timeout
+    jobs = [(structure, words, config, deadline) for config in configs]
+
+    with multiprocessing.Pool(workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+        for result in pool.imap_unordered(solve_config, jobs):
+            if not result["timed_out"]:
+                return result
+
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a crossword puzzle")
+    parser.add_argument("structure")
+    parser.add_argument("words")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--inference", choices=["mac", "forward", "none"], default="mac",
+                        help="propagation during search (default: mac)")
+    parser.add_argument("--domains", choices=sorted(SOLVERS), default="bitset",
+                        help="domain representation (default: bitset)")
+    parser.add_argument("--variables", choices=["mrv", "mrv-degree", "dom-wdeg"],
+                        default="dom-wdeg", help="variable ordering (default: dom-wdeg)")
+    parser.add_argument("--portfolio", type=int, default=0, metavar="N",
+                        help="race N solver configurations in parallel")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for --portfolio (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS",
+                        help="give up after this many seconds")
+    parser.add_argument("--solutions", type=int, default=None, metavar="N",
+                        help="print up to N distinct fills (0 for all)")
+    parser.add_argument("--count", action="store_true",
+                        help="print the number of fills")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search node and backtrack counts")
+    args = parser.parse_args()
+
+    crossword = Crossword(args.structure, args.words)
+    solver = SOLVERS[args.domains](crossword)
+    deadline = None if args.timeout is None else time.time() + args.timeout
+
+    if args.count or args.solutions is not None:
+        if args.count:
+            count = solver.count_solutions(args.inference, args.variables, deadline)
+        else:
+            count = 0
+            for assignment in solver.solutions(args.inference, args.solutions or None,
+                                               variables=args.variables, deadline=deadline):
+                if count:
+                    print()
+                solver.display(assignment)
+                count += 1
+        if solver.timed_out:
+            print("Timed out.")
+        if count is not None:
+            print(f"Solutions: {count}")
+        if args.stats:
+            print(f"Nodes: {solver.nodes}, backtracks: {solver.backtracks}")
+        return
+
+    if args.portfolio:
+        configs = portfolio_configs(args.portfolio, args.domains)
+        result = portfolio(args.structure, args.words, configs, args.timeout, args.workers)
+    else:
+        assignment = solver.solve(args.inference, deadline=deadline,
+                                  variables=args.variables)
+        result = {
+            "config": None,
+            "assignment": assignment,
+            "timed_out": solver.timed_out,
+            "nodes": solver.nodes,
+            "backtracks": solver.backtracks,
+            "restarts": solver.restarts
+        }
 
-    if assignment is None:
+    if result is None or result["timed_out"]:
+        print("Timed out.")
+    elif result["assignment"] is None:
         print("No solution.")
     else:
-        solver.display(assignment)
-        if output:
-            solver.save(assignment, output)
+        solver.display(result["assignment"])
+        if args.output:
+            solver.save(result["assignment"], args.output)
+
+    if args.stats and result is not None:
+        if result["config"] is not None:
+            print(f"Winner: {result['config']}")
+        print(f"Nodes: {result['nodes']}, backtracks: {result['backtracks']}, "
+              f"restarts: {result['restarts']}")
 
 if __name__ == "__main__":
     main()